@@ -0,0 +1,43 @@
+"""Benchmark the spectral-gating denoiser: CPU cost per second of audio."""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+from audio.denoiser import SpectralGateDenoiser
+from utils.settings import SettingsManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of synthetic audio to process")
+    parser.add_argument("--frames", type=int, nargs="+", default=[512, 1024, 2048, 4096, 8192])
+    args = parser.parse_args()
+
+    settings = SettingsManager()
+    settings.noise_reduction_budget = 10.0  # Never bypass while benchmarking
+    rng = np.random.default_rng(0)
+
+    print(f"{'frames':>8} {'ms/block':>10} {'ms/s audio':>12} {'realtime x':>11}")
+    for frames in args.frames:
+        settings.frames_per_buffer = frames
+        denoiser = SpectralGateDenoiser(settings)
+        n_blocks = max(1, int(args.seconds * settings.rate / frames))
+        blocks = rng.normal(0, 1000, (n_blocks, frames)).astype(np.int16)
+
+        start = time.perf_counter()
+        for block in blocks:
+            denoiser.process(block)
+        elapsed = time.perf_counter() - start
+
+        audio_seconds = n_blocks * frames / settings.rate
+        print(f"{frames:>8} {elapsed / n_blocks * 1000:>10.3f} {elapsed / audio_seconds * 1000:>12.3f} "
+              f"{audio_seconds / elapsed:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
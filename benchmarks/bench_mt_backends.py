@@ -0,0 +1,83 @@
+"""Benchmark MT engines: load time, resident size and translation latency on the same inputs."""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+from models.mt_backends import MT_BACKENDS, create_mt_backend
+from utils.settings import SettingsManager
+
+
+SENTENCES = [
+    "Hello, how are you?",
+    "I think we should move the meeting to Thursday afternoon.",
+    "The weather is nice today",
+    "Can you hear me now",
+    "Please share your screen so everyone can see the presentation.",
+    "We are going to need a bigger boat",
+    "Thank you very much for joining us today, let's get started with the first item on the agenda.",
+    "What time is it",
+]
+
+
+def rss_mb() -> float:
+    """Process resident memory in MB, NaN when psutil is not installed."""
+    try:
+        import psutil
+    except ImportError:
+        return float("nan")
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=None, help="MT model path or hub id (default: current language pair)")
+    parser.add_argument("--engines", nargs="+", default=sorted(MT_BACKENDS), choices=sorted(MT_BACKENDS))
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the sentence set per engine")
+    parser.add_argument("--config", default="config.json", help="Settings file to start from")
+    args = parser.parse_args()
+
+    settings = SettingsManager.load_from_file(args.config)
+    path = args.model or settings.mt_model_path
+
+    print(f"model: {path}, {len(SENTENCES)} sentences x {args.repeats}")
+    print(f"{'engine':>7} {'load s':>7} {'size MB':>8} {'+RSS MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch ms':>9}")
+    outputs = {}
+    for engine in args.engines:
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        backend = create_mt_backend(engine, path, settings)
+        backend.load()
+        backend.warmup()
+        load_s = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(args.repeats):
+            for sentence in SENTENCES:
+                start = time.perf_counter()
+                backend.translate_batch([sentence])
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            outputs[engine] = backend.translate_batch(SENTENCES)
+        batch_ms = (time.perf_counter() - start) * 1000 / args.repeats
+
+        print(f"{engine:>7} {load_s:>7.2f} {backend.size_bytes() / 1024 ** 2:>8.0f} {rss_mb() - rss_before:>8.0f} "
+              f"{np.percentile(latencies, 50):>8.1f} {np.percentile(latencies, 95):>8.1f} {batch_ms:>9.1f}")
+        del backend
+
+    # Engines should agree; greedy decoding differences usually come down to float rounding
+    if len(outputs) > 1:
+        reference, *others = args.engines
+        for engine in others:
+            same = sum(a == b for a, b in zip(outputs[reference], outputs[engine]))
+            print(f"{engine} matches {reference} on {same}/{len(SENTENCES)} sentences")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the "compiled" MT engine (SDPA + torch.compile, bucketed shapes) with eager torch, per length bucket.
+
+Inputs are built from the bundled sample sentences so that each bucket gets sources whose token
+count falls inside it. Run it twice: the first run compiles, the second shows the cached load time.
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+from models.mt_backends import create_mt_backend
+from utils.settings import SettingsManager
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "data", "mt_samples.tsv")
+
+
+def bucket_inputs(tokenizer, sentences: list[str], buckets: list[int], per_bucket: int) -> dict[int, list[str]]:
+    """Up to per_bucket texts per bucket, made of consecutive sample sentences, whose length fits that bucket."""
+    inputs = {bucket: [] for bucket in buckets}
+    for start in range(len(sentences)):
+        text = ""
+        for sentence in sentences[start:]:
+            text = f"{text} {sentence}".strip()
+            length = len(tokenizer(text).input_ids)
+            bucket = next((b for b in buckets if b >= length), None)
+            if bucket is None:
+                break
+            lower = max([b for b in buckets if b < bucket], default=0)
+            if length > lower and len(inputs[bucket]) < per_bucket:
+                inputs[bucket].append(text)
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="MT model path or hub id (default: current language pair)")
+    parser.add_argument("--per-bucket", type=int, default=8, help="Inputs per length bucket")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over each bucket's inputs")
+    parser.add_argument("--samples", default=SAMPLES, help="TSV with one column per language code")
+    parser.add_argument("--config", default="config.json", help="Settings file to start from")
+    args = parser.parse_args()
+
+    settings = SettingsManager.load_from_file(args.config)
+    path = args.model or settings.mt_model_path
+    with open(args.samples, encoding="utf-8", newline="") as f:
+        sentences = [row[settings.from_code] for row in csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)]
+
+    backends = {}
+    for engine in ("torch", "compiled"):
+        start = time.perf_counter()
+        backend = create_mt_backend(engine, path, settings)
+        backend.load()
+        backend.warmup()
+        backends[engine] = backend
+        print(f"{engine}: loaded in {time.perf_counter() - start:.1f}s")
+    if not backends["compiled"].compiled:
+        print("compiled engine fell back to eager, see the log")
+
+    buckets = sorted(settings.mt_compile_buckets)
+    inputs = bucket_inputs(backends["torch"].tokenizer, sentences, buckets, args.per_bucket)
+    print(f"model: {path}, device: {backends['torch'].device}")
+    print(f"{'bucket':>6} {'inputs':>6} {'eager ms':>9} {'compiled ms':>12} {'speed-up':>9} {'same':>5}")
+    for bucket in buckets:
+        texts = inputs[bucket]
+        if not texts:
+            continue
+        medians, outputs = {}, {}
+        for engine, backend in backends.items():
+            latencies = []
+            for _ in range(args.repeats):
+                for text in texts:
+                    start = time.perf_counter()
+                    outputs.setdefault(engine, {})[text] = backend.translate_batch([text])[0]
+                    latencies.append((time.perf_counter() - start) * 1000)
+            medians[engine] = np.percentile(latencies, 50)
+        same = sum(outputs["torch"][text] == outputs["compiled"][text] for text in texts)
+        print(f"{bucket:>6} {len(texts):>6} {medians['torch']:>9.1f} {medians['compiled']:>12.1f} "
+              f"{medians['torch'] / medians['compiled']:>8.2f}x {same:>2}/{len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
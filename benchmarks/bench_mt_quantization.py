@@ -0,0 +1,72 @@
+"""Compare the INT8 MT engine with float torch: size, latency and BLEU/chrF on the bundled sample set.
+
+Run it per language pair to decide whether to prefix that pair's mt_model_paths entry with "int8:".
+Needs sacrebleu (pip install sacrebleu).
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import sacrebleu
+from models.mt_backends import MT_BACKENDS, create_mt_backend
+from utils.settings import SettingsManager
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "data", "mt_samples.tsv")
+
+
+def load_samples(path: str, source: str, target: str) -> tuple[list[str], list[str]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE))
+    if not rows or source not in rows[0] or target not in rows[0]:
+        raise SystemExit(f"{path} has no {source}/{target} columns")
+    return [row[source] for row in rows], [row[target] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pair", default=None, help="Language pair such as en-ru (default: from config)")
+    parser.add_argument("--model", default=None, help="MT model path or hub id (default: the pair's configured model)")
+    parser.add_argument("--engines", nargs="+", default=["torch", "int8"], choices=sorted(MT_BACKENDS))
+    parser.add_argument("--samples", default=SAMPLES, help="TSV with one column per language code")
+    parser.add_argument("--config", default="config.json", help="Settings file to start from")
+    args = parser.parse_args()
+
+    settings = SettingsManager.load_from_file(args.config)
+    if args.pair:
+        settings.from_code, settings.to_code = args.pair.split("-")
+    path = args.model or settings.mt_model_path
+    sources, references = load_samples(args.samples, settings.from_code, settings.to_code)
+
+    print(f"model: {path}, {settings.from_code}-{settings.to_code}, {len(sources)} sentences")
+    print(f"{'engine':>7} {'size MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'BLEU':>6} {'chrF':>6} {'dBLEU':>6} {'dchrF':>6}")
+    baseline = None
+    for engine in args.engines:
+        backend = create_mt_backend(engine, path, settings)
+        backend.load()
+        backend.warmup()
+
+        hypotheses, latencies = [], []
+        for sentence in sources:
+            start = time.perf_counter()
+            hypotheses.extend(backend.translate_batch([sentence]))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        bleu = sacrebleu.corpus_bleu(hypotheses, [references]).score
+        chrf = sacrebleu.corpus_chrf(hypotheses, [references]).score
+        if baseline is None:
+            baseline = (bleu, chrf)
+        print(f"{engine:>7} {backend.size_bytes() / 1024 ** 2:>8.0f} {np.percentile(latencies, 50):>8.1f} "
+              f"{np.percentile(latencies, 95):>8.1f} {bleu:>6.1f} {chrf:>6.1f} "
+              f"{bleu - baseline[0]:>+6.1f} {chrf - baseline[1]:>+6.1f}")
+        del backend
+
+
+if __name__ == "__main__":
+    main()
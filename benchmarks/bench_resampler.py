@@ -0,0 +1,42 @@
+"""Benchmark the streaming resampler: CPU cost per capture block for common device formats."""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+from audio.resampler import StreamResampler
+from utils.settings import SettingsManager
+
+
+FORMATS = [(48000, 2), (48000, 1), (44100, 2), (44100, 1), (32000, 1), (22050, 1), (16000, 2)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of synthetic audio per format")
+    args = parser.parse_args()
+
+    settings = SettingsManager()
+    rng = np.random.default_rng(0)
+
+    print(f"{'format':>14} {'block':>7} {'ms/block':>10} {'max ms':>8} {'block ms':>9} {'load %':>7}")
+    for rate, channels in FORMATS:
+        resampler = StreamResampler(rate, settings.rate, channels)
+        block_frames = round(settings.frames_per_buffer * rate / settings.rate)
+        n_blocks = max(1, int(args.seconds * rate / block_frames))
+        block = rng.normal(0, 1000, block_frames * channels).astype(np.int16)
+
+        for _ in range(n_blocks):
+            resampler.process(block)
+
+        block_ms = block_frames / rate * 1000
+        cost = resampler.cost_per_block_ms()
+        print(f"{f'{rate} Hz {channels}ch':>14} {block_frames:>7} {cost:>10.3f} "
+              f"{resampler.max_block_seconds * 1000:>8.3f} {block_ms:>9.1f} {cost / block_ms * 100:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
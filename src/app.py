@@ -1,8 +1,15 @@
 """FlowlApp orchestrates the audio engine, queues, workers, and models."""
 
 import threading
+import time
 from collections import deque
+import numpy as np
 from audio.engine import AudioEngine
+from audio.source import AudioSource, FileAudioSource
+from audio.recorder import SessionRecorder, RecordedSessionSource, EXTENSION as RECORDING_EXTENSION
+from audio.ring_buffer import AudioRingBuffer
+from audio.vad import VoiceActivityDetector
+from audio.resampler import StreamResampler
 from audio.workers import ASRWorker, MTWorker
 from models.bundle import ModelBundle
 from utils.device_manager import DeviceManager
@@ -11,17 +18,21 @@ from utils.logger import logger
 
 
 class FlowlApp:
+    # Settings that can be applied with switch_device() instead of a full restart
+    DEVICE_ONLY_FIELDS = {"device_index", "device_name", "device_hostapi"}
+
     def __init__(self, ui_callback=None, settings=None):
         self.mt = None
         self.asr = None
-        self.audio_engine = None
+        self.audio_engine: AudioSource = None
         self.device_manager = None
         self.models = None
-        self.audio_q: deque[bytes] = deque(maxlen=50)
         self.events_q: deque[tuple[str, str]] = deque(maxlen=100)
         
         # Load settings
         self.settings = settings or SettingsManager.load_from_file()
+        self.audio_buffer: AudioRingBuffer = None
+        self.recorder: SessionRecorder = None
         
         # Create locks for thread-safe queue operations
         self._audio_lock = threading.Condition()
@@ -30,34 +41,137 @@ class FlowlApp:
         self.build_components()
 
     def build_components(self):
-        self.models = ModelBundle(self.settings)
+        # Models load in the background; device probing below overlaps with it
+        self.models = ModelBundle(self.settings, on_progress=self._on_model_progress)
         
-        # Initialize device manager and find device
-        self.device_manager = DeviceManager(self.settings)
-        device_index = self.device_manager.startup()
+        # Noise reduction runs on the ASR thread, so the audio source itself gets no reducer
+        noise_reducer = self.models.get_noise_reducer()
+        resampler = self._build_audio_input()
+        if self.audio_engine.device_index is not None:
+            logger.info(f"Created audio engine (device: {self.audio_engine.device_index}) "
+                       f"{'with noise cancelling' if noise_reducer is not None else 'without noise cancelling'}")
+
+        vad = VoiceActivityDetector(self.settings) if self.settings.vad_enabled else None
+        # Blocks only until Vosk is loaded; MT keeps loading and MTWorker holds finals until it is ready
+        self.asr = ASRWorker(self.audio_buffer, self.events_q, self.models.recognizer, self._audio_lock, self._events_lock, self.settings, vad=vad, noise_reducer=noise_reducer, resampler=resampler)
+        self.mt = MTWorker(self.events_q, self.models.translate, self._events_lock, self._ui_callback, self.settings,
+                           ready=self.models.mt_ready, translate_batch_fn=self.models.translate_batch,
+                           translate_partial_fn=self.models.translate_partial,
+                           translate_stream_fn=self.models.translate_stream,
+                           translate_commit_fn=self.models.translate_commit)
+
+    def _on_model_progress(self, message: str) -> None:
+        if self._ui_callback:
+            self._ui_callback("loading", {"message": message, "timestamp": time.time()})
+
+    def _build_audio_input(self) -> StreamResampler | None:
+        """Create the audio source, its ring buffer and recorder; return the resampler it needs (if any)."""
+        if self.settings.audio_source == "file" and (self.settings.audio_file_path or "").endswith(RECORDING_EXTENSION):
+            # Recorded session: replays with the original chunk boundaries and timing
+            self.device_manager = None
+            self.audio_engine = RecordedSessionSource(
+                on_audio=self._on_audio,
+                settings=self.settings,
+                path=self.settings.audio_file_path,
+                realtime=self.settings.audio_file_realtime,
+            )
+        elif self.settings.audio_source == "file":
+            self.device_manager = None
+            self.audio_engine = FileAudioSource(
+                on_audio=self._on_audio,
+                settings=self.settings,
+                path=self.settings.audio_file_path,
+                realtime=self.settings.audio_file_realtime,
+                raw_rate=self.settings.audio_file_rate,
+                raw_channels=self.settings.audio_file_channels,
+            )
+        else:
+            # Initialize device manager and find device
+            self.device_manager = DeviceManager(self.settings)
+            self._build_device_engine(self.device_manager.startup())
+        return self._build_capture()
+
+    def _build_device_engine(self, device_index: int | None) -> None:
+        if device_index is not None:
+            capture_rate, channels = self.device_manager.capture_format(device_index)
+        else:
+            capture_rate, channels = self.settings.rate, 1
 
         self.audio_engine = AudioEngine(
-            on_audio=self._on_audio, 
+            on_audio=self._on_audio,
             device_index=device_index,
             settings=self.settings,
             noise_reducer=None,
+            capture_rate=capture_rate,
+            channels=channels,
         )
-        if device_index is not None:
-            logger.info(f"Created audio engine (device: {device_index}) "
-                       f"{"with noise cancelling" if self.models.get_noise_reducer() is not None else "without noise cancelling"}")
 
-        self.asr = ASRWorker(self.audio_q, self.events_q, self.models.recognizer, self._audio_lock, self._events_lock, self.settings)
-        self.mt = MTWorker(self.events_q, self.models.translate, self._events_lock, self._ui_callback, self.settings)
+    def _build_capture(self) -> StreamResampler | None:
+        """Ring buffer and recorder for the current audio source; return the resampler it needs (if any)."""
+        capture_rate, channels = self.audio_engine.capture_rate, self.audio_engine.channels
+        self.audio_buffer = AudioRingBuffer(
+            self.audio_engine.block_frames * channels * self.settings.audio_buffer_blocks, channels
+        )
+
+        self.recorder = None
+        if self.settings.record_session and self.settings.audio_source == "device":
+            self.recorder = SessionRecorder(
+                SessionRecorder.session_path(self.settings.record_dir),
+                capture_rate, channels, self.audio_engine.block_frames * channels,
+            )
+
+        # Downmix/resample to the recognizer format on the ASR thread
+        resampler = StreamResampler(capture_rate, self.settings.rate, channels)
+        return None if resampler.is_passthrough else resampler
+
+    def switch_device(self, device_index: int | None) -> None:
+        """Swap the input device in place: models and worker threads stay alive."""
+        start = time.perf_counter()
+        if self.audio_engine:
+            self.audio_engine.stop()
+        if self.recorder is not None:
+            self.recorder.stop()
+
+        self.settings.device_index = device_index
+        if self.device_manager is not None:
+            # Same device list (no PortAudio rescan); only the chosen device is probed,
+            # which is normally a cache hit after the settings screen's probe
+            self._build_device_engine(self.device_manager.select(device_index))
+            resampler = self._build_capture()
+        else:
+            resampler = self._build_audio_input()
+        with self._audio_lock:
+            # The ASR thread flushes the recognizer and picks up the new input between chunks
+            self.asr.swap_input(self.audio_buffer, resampler)
+            self._audio_lock.notify_all()
 
+        if self.recorder is not None:
+            self.recorder.start()
+        self.audio_engine.start()
+        logger.info(f"Switched input device to {self.audio_engine.device_index} "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms", "APP")
 
-    def _on_audio(self, in_data: bytes) -> None:
+    def _on_audio(self, in_data: np.ndarray, adc_time: float = None) -> None:
         """Callback for audio data."""
-        # deque with maxlen automatically handles overflow by removing the oldest items
+        if self.recorder is not None:
+            self.recorder.append(in_data, adc_time)
+
+        # Copy straight into the preallocated ring; a full ring drops and counts the excess
         with self._audio_lock:
-            self.audio_q.append(in_data)
+            if self.audio_engine.blocking:
+                # Unthrottled replay: wait for the ASR side instead of dropping audio
+                while self.audio_buffer.free < in_data.size and not self.audio_buffer.closed:
+                    self._audio_lock.wait()
+            overruns = self.audio_buffer.overruns
+            self.audio_buffer.write(in_data)
             self._audio_lock.notify()
+        if self.audio_buffer.overruns != overruns and self.audio_buffer.overruns % 50 == 1:
+            logger.warning(f"Audio ring buffer overrun: {self.audio_buffer.stats()}", "APP")
     
     def start(self) -> None:
+        if self.recorder is not None:
+            self.recorder.start()
+
         # Start audio engine if available
         if self.audio_engine:
             self.audio_engine.start()
@@ -71,14 +185,25 @@ class FlowlApp:
 
     def restart(self) -> None:
         if self.is_running():
+            new_settings = SettingsManager.load_from_file()
+            # Both sides through the same JSON round-trip, or tuple fields always look changed
+            current, saved = self.settings.to_json_dict(), new_settings.to_json_dict()
+            changed = {key for key, value in saved.items() if current.get(key) != value}
+            if changed and changed <= self.DEVICE_ONLY_FIELDS and self.device_manager is not None:
+                # Only the input device changed: hot-swap it instead of reloading models
+                self.settings.update_from_dict({key: saved[key] for key in changed})
+                self.switch_device(self.settings.device_index)
+                return None
+
             logger.info("Restarting app with new settings...", "APP")
             self.stop()
             # Wait briefly to let the OS release the audio device lock.
             # Without this, the DeviceManager might fail to test the saved device because it's still locked from stop(), causing it to incorrectly fall back to the default device.
-            import time
             time.sleep(0.5)
             # Reload settings from file to get latest changes
-            self.settings = SettingsManager.load_from_file()
+            self.settings = new_settings
+            # Hand the models back to the registry; build_components() reuses them if still wanted
+            self.models.close()
             logger.info(f"Reloaded settings - device_index: {self.settings.device_index}", "APP")
             self.build_components()
             self.start()
@@ -88,43 +213,57 @@ class FlowlApp:
     def is_running(self) -> bool:
         return self.audio_engine.is_active() if self.audio_engine else False
 
+    def finish_input(self) -> None:
+        """End of input (e.g. a replayed file is done): ASR drains the ring buffer, emits its last final and exits."""
+        with self._audio_lock:
+            self.audio_buffer.close()
+            self._audio_lock.notify_all()
+
+    def _join_worker(self, thread_name: str, thread: threading.Thread) -> None:
+        if not thread.is_alive():
+            return
+        thread.join(timeout=2.0)
+        if thread.is_alive():
+            logger.warning(f"{thread_name} thread did not stop within timeout")
+        else:
+            logger.info(f"{thread_name} thread stopped")
+
     def stop(self) -> None:
         """Stop audio engine and worker threads gracefully."""
         logger.info("Stopping FlowlApp...")
         
+        # A blocking (replay) source may be waiting for ring space, release it before stopping
+        if self.audio_engine and self.audio_engine.blocking:
+            with self._audio_lock:
+                self.audio_buffer.close()
+                self._audio_lock.notify_all()
+
         # Stop audio engine first to prevent new data from entering queues
         if self.audio_engine:
             self.audio_engine.stop()
             logger.info("Audio engine stopped")
+
+        if self.recorder is not None:
+            self.recorder.stop()
         
-        # Signal threads to stop by sending sentinel values
+        # Signal threads to stop by closing the ring buffer / sending sentinel values
         try:
             with self._audio_lock:
-                self.audio_q.append(None)
-                self._audio_lock.notify()
+                self.audio_buffer.close()
+                self._audio_lock.notify_all()
         except Exception as e:
             logger.warning(f"Error sending audio sentinel: {e}")
             
+        # ASR drains the ring and emits its last final first, so MT gets the sentinel after it
+        self._join_worker("ASR", self.asr)
         try:
             with self._events_lock:
                 self.events_q.append(("final", None))  # MTWorker exits on this sentinel
                 self._events_lock.notify()
         except Exception as e:
             logger.warning(f"Error sending events sentinel: {e}")
-        
-        # Join worker threads with timeout
-        threads_to_join = []
-        if self.asr.is_alive():
-            threads_to_join.append(("ASR", self.asr))
-        if self.mt.is_alive():
-            threads_to_join.append(("MT", self.mt))
-        
-        for thread_name, thread in threads_to_join:
-            thread.join(timeout=2.0)
-            if thread.is_alive():
-                logger.warning(f"{thread_name} thread did not stop within timeout")
-            else:
-                logger.info(f"{thread_name} thread stopped")
-        
+        self._join_worker("MT", self.mt)
+
+        self.models.flush_translations()
         logger.info("FlowlApp stopped")
     
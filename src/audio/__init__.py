@@ -1,10 +1,23 @@
 """Audio package public API."""
 
+from .source import AudioSource, FileAudioSource
 from .engine import AudioEngine
+from .recorder import SessionRecorder, RecordedSessionSource, read_session
+from .ring_buffer import AudioRingBuffer
+from .vad import VoiceActivityDetector
+from .denoiser import SpectralGateDenoiser
 from .workers import ASRWorker, MTWorker
 
 __all__ = [
+    "AudioSource",
+    "FileAudioSource",
     "AudioEngine",
+    "SessionRecorder",
+    "RecordedSessionSource",
+    "read_session",
+    "AudioRingBuffer",
+    "VoiceActivityDetector",
+    "SpectralGateDenoiser",
     "ASRWorker",
     "MTWorker",
 ]
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Streaming spectral-gating noise reduction for the ASR input."""
+
+import time
+import numpy as np
+from utils.logger import logger
+
+
+class SpectralGateDenoiser:
+    """
+    Spectral gating over a 50% overlap-add STFT (sqrt-Hann analysis/synthesis windows).
+    Audio is processed in frames_per_buffer blocks, each block being a batch of STFT
+    frames handled in one vectorized pass. The noise profile is learned continuously
+    from the quietest frames of every block.
+
+    Meant to run on the ASR thread, never inside the PortAudio callback. When a block
+    takes longer than its CPU budget the denoiser bypasses itself for a few blocks.
+    """
+    FFT_SIZE = 512
+    BYPASS_BLOCKS = 20
+
+    def __init__(self, settings, block_size: int = None):
+        self.settings = settings
+        self._block = block_size or settings.frames_per_buffer
+        self._n_fft = min(self.FFT_SIZE, self._block * 2)
+        self._hop = self._n_fft // 2
+        if self._block % self._hop:
+            raise ValueError(f"Block size {self._block} is not a multiple of the denoiser hop {self._hop}")
+
+        self._window = np.sqrt(np.hanning(self._n_fft + 1)[:-1]).astype(np.float32)
+        self._strength = float(settings.noise_reduction_strength)
+        self._floor = float(settings.noise_reduction_floor)
+        self._fall = 0.3   # Per-block adaptation speed when the noise estimate drops
+        self._rise = 0.02  # ... and when it rises, kept slow so speech does not leak in
+
+        self._in_tail = np.zeros(self._hop, dtype=np.float32)
+        self._out_tail = np.zeros(self._hop, dtype=np.float32)
+        self._noise_psd = None
+
+        # CPU budget as a fraction of the block's real-time duration
+        self._budget_s = settings.noise_reduction_budget * self._block / settings.rate
+        self._bypass_left = 0
+
+        # Stats
+        self.processed_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.over_budget = 0
+
+    def _update_noise(self, power: np.ndarray) -> None:
+        # Estimate the noise spectrum from the quieter half of the block's frames
+        frame_energy = power.sum(axis=1)
+        quiet = power[frame_energy <= np.median(frame_energy)]
+        estimate = quiet.mean(axis=0)
+        if self._noise_psd is None:
+            self._noise_psd = estimate
+            return
+        rate = np.where(estimate < self._noise_psd, self._fall, self._rise)
+        self._noise_psd += rate * (estimate - self._noise_psd)
+
+    def _gate(self, samples: np.ndarray) -> np.ndarray:
+        x = np.concatenate((self._in_tail, samples.astype(np.float32)))
+        self._in_tail = x[-self._hop:]
+
+        frames = np.lib.stride_tricks.sliding_window_view(x, self._n_fft)[::self._hop]
+        spec = np.fft.rfft(frames * self._window, axis=1)
+        power = spec.real ** 2 + spec.imag ** 2 + 1e-6
+        self._update_noise(power)
+
+        gain = np.maximum(self._floor, 1.0 - self._strength * self._noise_psd / power)
+        # Light smoothing across frequency keeps the mask from producing musical noise
+        gain[:, 1:-1] = (gain[:, :-2] + gain[:, 1:-1] + gain[:, 2:]) * (1.0 / 3.0)
+
+        out = np.fft.irfft(spec * gain, n=self._n_fft, axis=1) * self._window
+
+        # 50% overlap-add: first half of each frame + second half of the previous one
+        prev_halves = np.concatenate((self._out_tail[np.newaxis, :], out[:-1, self._hop:]))
+        self._out_tail = out[-1, self._hop:].copy()
+        y = (out[:, :self._hop] + prev_halves).reshape(-1)
+        return np.clip(y, -32768, 32767).astype(np.int16)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Denoise one block of int16 samples. Output is delayed by one hop (FFT_SIZE / 2)."""
+        samples = samples.reshape(-1)
+        if samples.shape[0] % self._hop:
+            return samples
+
+        if self._bypass_left > 0:
+            self._bypass_left -= 1
+            if self._bypass_left == 0:
+                self.reset()
+            return samples
+
+        start = time.perf_counter()
+        out = self._gate(samples)
+        elapsed = time.perf_counter() - start
+
+        self.cpu_seconds += elapsed
+        self.processed_seconds += samples.shape[0] / self.settings.rate
+        if elapsed > self._budget_s:
+            self.over_budget += 1
+            self._bypass_left = self.BYPASS_BLOCKS
+            logger.warning(f"Noise reduction took {elapsed * 1000:.1f} ms (budget {self._budget_s * 1000:.1f} ms), "
+                           f"bypassing for {self.BYPASS_BLOCKS} blocks", "AUDIO")
+        return out
+
+    def cost_per_second(self) -> float:
+        """CPU seconds spent per second of processed audio."""
+        return self.cpu_seconds / self.processed_seconds if self.processed_seconds else 0.0
+
+    def reset(self) -> None:
+        """Clear overlap state (the noise profile is kept)."""
+        self._in_tail[:] = 0
+        self._out_tail[:] = 0
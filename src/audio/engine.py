@@ -3,15 +3,23 @@
 from typing import Callable
 import sounddevice as sd
 import numpy as np
+from audio.source import AudioSource
+from utils.device_manager import acquire_portaudio, release_portaudio
 from utils.logger import logger
 
-class AudioEngine:
-    def __init__(self, on_audio: Callable[[bytes], None], device_index: int, settings, noise_reducer=None):
-        self._on_audio = on_audio
+class AudioEngine(AudioSource):
+    """Microphone capture through sounddevice.InputStream."""
+    def __init__(self, on_audio: Callable[..., None], device_index: int, settings, noise_reducer=None,
+                 capture_rate: int = None, channels: int = 1):
+        # Capture format; blocks are sized so that after resampling they hold ~frames_per_buffer samples
+        super().__init__(on_audio, settings, capture_rate=capture_rate, channels=channels)
         self._stream = None
         self._input_device_index = device_index
         self._noise_reducer = noise_reducer
-        self.settings = settings
+
+    @property
+    def device_index(self) -> int | None:
+        return self._input_device_index
 
     def _callback(self, in_data: np.ndarray, frame_count: int, time_info, status) -> None:
         if status:
@@ -21,7 +29,8 @@ class AudioEngine:
         if in_data is None or len(in_data) == 0:
             return
 
-        self._on_audio(in_data.tobytes())
+        # Hand the PortAudio block over as-is; the consumer copies it into its ring buffer
+        self._on_audio(in_data, time_info.inputBufferAdcTime)
 
 
     def start(self) -> None:
@@ -31,19 +40,28 @@ class AudioEngine:
             
         try:
             if self._stream is None:
+                # Registered for the stream's lifetime so a device rescan does not terminate PortAudio under it
+                acquire_portaudio()
                 self._stream = sd.InputStream(
                     device=self._input_device_index,
-                    blocksize=self.settings.frames_per_buffer,
-                    samplerate=self.settings.rate,
-                    channels=1,
+                    blocksize=self.block_frames,
+                    samplerate=self.capture_rate,
+                    channels=self.channels,
                     dtype='int16',
                     callback=self._callback,
                 )
             self._stream.start()
-            logger.info(f"Audio engine started on device {self._input_device_index}", "AUDIO")
+            logger.info(f"Audio engine started on device {self._input_device_index} "
+                        f"({self.capture_rate} Hz, {self.channels} ch)", "AUDIO")
         except Exception as e:
             logger.error(f"Failed to start audio engine: {e}", "AUDIO")
+            if self._stream is not None:
+                try:
+                    self._stream.close()
+                except Exception:
+                    pass
             self._stream = None
+            release_portaudio()
 
     def is_active(self) -> bool:
         return self._stream is not None and self._stream.active
@@ -59,5 +77,6 @@ class AudioEngine:
                 logger.error(f"Error stopping audio engine: {e}", "AUDIO")
             finally:
                 self._stream = None
+                release_portaudio()
 
 
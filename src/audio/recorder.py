@@ -0,0 +1,199 @@
+"""Session audio recorder and exact replay of recorded sessions."""
+
+import os
+import time
+import struct
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Iterator
+import numpy as np
+
+from audio.source import AudioSource
+from utils.logger import logger
+
+
+# File layout: header, then append-only records of (adc_time, arrival, n_samples) + int16 payload
+MAGIC = b"FLWREC1\0"
+HEADER = struct.Struct("<8sIHH")   # magic, sample rate, channels, reserved
+RECORD = struct.Struct("<ddI")     # PortAudio ADC time, arrival offset (s), interleaved sample count
+EXTENSION = ".flrec"
+
+
+class SessionRecorder:
+    """
+    Records every audio block with its PortAudio ADC time and arrival timestamp.
+    The audio callback copies blocks into a fixed pool of preallocated buffers
+    (bounded memory, no allocation); a background thread writes them to disk.
+    When the pool is exhausted blocks are dropped and counted rather than blocking audio.
+    """
+    def __init__(self, path: str, rate: int, channels: int, block_samples: int, pool_blocks: int = 64):
+        self.path = path
+        self.rate = rate
+        self.channels = channels
+        self._block_samples = block_samples
+        self._free = deque(np.zeros(block_samples, dtype=np.int16) for _ in range(pool_blocks))
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self._file = None
+        self._t0 = 0.0
+
+        self.recorded_blocks = 0
+        self.dropped_blocks = 0
+
+    def start(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, self.rate, self.channels, 0))
+        self._t0 = time.perf_counter()
+        self._running = True
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+        logger.info(f"Recording session audio to {self.path}", "RECORDER")
+
+    def append(self, samples: np.ndarray, adc_time: float = 0.0) -> None:
+        """Called from the audio callback: copy the block into a pooled buffer and queue it."""
+        if not self._running:
+            return
+        arrival = time.perf_counter() - self._t0
+        samples = samples.reshape(-1)
+        n = samples.shape[0]
+        try:
+            buf = self._free.popleft()
+        except IndexError:
+            self.dropped_blocks += 1
+            return
+        if buf.shape[0] < n:
+            # Oversized block (should not happen with a fixed blocksize): give up on this one
+            self._free.append(buf)
+            self.dropped_blocks += 1
+            return
+        buf[:n] = samples
+        self._pending.append((adc_time or 0.0, arrival, n, buf))
+        self._wakeup.set()
+
+    def _drain(self) -> None:
+        while self._pending:
+            adc_time, arrival, n, buf = self._pending.popleft()
+            self._file.write(RECORD.pack(adc_time, arrival, n))
+            self._file.write(memoryview(buf)[:n])
+            self._free.append(buf)
+            self.recorded_blocks += 1
+
+    def _writer(self) -> None:
+        while self._running:
+            self._wakeup.wait(0.5)
+            self._wakeup.clear()
+            try:
+                self._drain()
+            except Exception as e:
+                logger.error(f"Session recorder write failed: {e}", "RECORDER")
+                self._running = False
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._running = False
+        self._wakeup.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        try:
+            self._drain()
+            self._file.close()
+        except Exception as e:
+            logger.error(f"Session recorder close failed: {e}", "RECORDER")
+        logger.info(f"Session recording stopped: {self.recorded_blocks} blocks written, "
+                    f"{self.dropped_blocks} dropped ({self.path})", "RECORDER")
+
+    @staticmethod
+    def session_path(directory: str) -> str:
+        return os.path.join(directory, f"session-{datetime.now().strftime('%Y%m%d-%H%M%S')}{EXTENSION}")
+
+
+def read_session(path: str) -> tuple[int, int, Iterator[tuple[float, float, np.ndarray]]]:
+    """Open a recorded session. Returns (rate, channels, iterator of (adc_time, arrival, samples))."""
+    with open(path, "rb") as f:
+        magic, rate, channels, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"Not a Flowl session recording: {path}")
+
+    def records():
+        with open(path, "rb") as f:
+            f.seek(HEADER.size)
+            while True:
+                head = f.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return
+                adc_time, arrival, n = RECORD.unpack(head)
+                payload = f.read(n * 2)
+                if len(payload) < n * 2:
+                    return  # Truncated tail from an interrupted session
+                yield adc_time, arrival, np.frombuffer(payload, dtype=np.int16).reshape(-1, channels)
+
+    return rate, channels, records()
+
+
+class RecordedSessionSource(AudioSource):
+    """
+    Replays a session recording with its original chunk boundaries.
+    realtime=True reproduces the recorded arrival times (including callback jitter),
+    realtime=False delivers chunks as fast as the pipeline consumes them.
+    """
+    def __init__(self, on_audio: Callable[..., None], settings, path: str, realtime: bool = True,
+                 on_end: Callable[[], None] = None):
+        self.path = path
+        self.realtime = realtime
+        self.blocking = not realtime
+        self._on_end = on_end
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.finished = threading.Event()
+        self.blocks_sent = 0
+        self.frames_sent = 0
+
+        rate, channels, _ = read_session(path)
+        super().__init__(on_audio, settings, capture_rate=rate, channels=channels)
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            _, _, records = read_session(self.path)
+            for adc_time, arrival, samples in records:
+                if self._stop_event.is_set():
+                    break
+                if self.realtime:
+                    delay = start + arrival - time.perf_counter()
+                    if delay > 0 and self._stop_event.wait(delay):
+                        break
+                self._on_audio(samples, adc_time)
+                self.blocks_sent += 1
+                self.frames_sent += samples.shape[0]
+        except Exception as e:
+            logger.error(f"Session replay failed: {e}", "AUDIO")
+        finally:
+            logger.info(f"Session replay finished after {self.blocks_sent} blocks: {self.path}", "AUDIO")
+            self.finished.set()
+            if self._on_end and not self._stop_event.is_set():
+                self._on_end()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info(f"Session replay started: {self.path} ({self.capture_rate} Hz, {self.channels} ch, "
+                    f"{'real-time' if self.realtime else 'max speed'})", "AUDIO")
+
+    def is_active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
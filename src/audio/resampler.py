@@ -0,0 +1,95 @@
+"""Streaming polyphase resampler and downmixer from the device rate to the ASR rate."""
+
+import time
+from math import gcd
+import numpy as np
+
+
+class StreamResampler:
+    """
+    Converts interleaved int16 blocks captured at the device's native rate and channel
+    count into mono int16 at the recognizer rate.
+    Uses a Kaiser-windowed sinc low-pass split into L polyphase branches (rate ratio L/M).
+    Filter history and output phase are carried across blocks, so block boundaries are
+    seamless and blocks may have any length.
+    """
+    ZERO_CROSSINGS = 10
+    KAISER_BETA = 8.0
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1):
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.channels = int(channels)
+
+        g = gcd(self.in_rate, self.out_rate)
+        self._up = self.out_rate // g      # L
+        self._down = self.in_rate // g     # M
+
+        # Prototype low-pass at the upsampled rate, cut off below the lower Nyquist
+        factor = max(self._up, self._down)
+        taps_per_phase = -(-2 * self.ZERO_CROSSINGS * factor // self._up)
+        n_taps = taps_per_phase * self._up
+        cutoff = 0.5 / factor * 0.9
+        n = np.arange(n_taps) - (n_taps - 1) / 2.0
+        h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(n_taps, self.KAISER_BETA)
+        h *= self._up / h.sum()  # Zero-stuffing divides the gain by L, so the filter restores it
+
+        # bank[p, k] = h[p + k*L], reversed along k so it lines up with sliding windows
+        self._bank = h.reshape(taps_per_phase, self._up).T[:, ::-1].astype(np.float32).copy()
+        self._taps = taps_per_phase
+
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._t = 0  # Next output position (upsampled domain) relative to the current block start
+
+        # Stats
+        self.blocks = 0
+        self.total_seconds = 0.0
+        self.max_block_seconds = 0.0
+
+    @property
+    def is_passthrough(self) -> bool:
+        return self._up == self._down and self.channels == 1
+
+    def input_frames_for(self, out_frames: int) -> int:
+        """Approximate number of input frames (per channel) that yield out_frames."""
+        return -(-out_frames * self._down // self._up)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Resample one interleaved int16 block. Returns mono int16 at out_rate."""
+        start = time.perf_counter()
+
+        x = block.reshape(-1).astype(np.float32)
+        if self.channels > 1:
+            x = x[:x.shape[0] - x.shape[0] % self.channels].reshape(-1, self.channels).mean(axis=1)
+
+        if self._up == self._down:
+            out = x
+        else:
+            n_in = x.shape[0]
+            ext = np.concatenate((self._history, x))
+            # Upsampled positions of every output sample falling inside this block
+            t = np.arange(self._t, n_in * self._up, self._down)
+            idx, phase = np.divmod(t, self._up)
+            windows = np.lib.stride_tricks.sliding_window_view(ext, self._taps)[idx]
+            out = np.einsum("ij,ij->i", windows, self._bank[phase])
+
+            next_t = (t[-1] + self._down) if t.shape[0] else self._t
+            self._t = int(next_t - n_in * self._up)
+            self._history = ext[ext.shape[0] - (self._taps - 1):].copy()
+
+        result = np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+        elapsed = time.perf_counter() - start
+        self.blocks += 1
+        self.total_seconds += elapsed
+        if elapsed > self.max_block_seconds:
+            self.max_block_seconds = elapsed
+        return result
+
+    def cost_per_block_ms(self) -> float:
+        """Mean CPU time per processed block, in milliseconds."""
+        return self.total_seconds / self.blocks * 1000 if self.blocks else 0.0
+
+    def reset(self) -> None:
+        self._history[:] = 0
+        self._t = 0
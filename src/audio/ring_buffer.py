@@ -0,0 +1,121 @@
+"""Preallocated int16 ring buffer shared between the audio callback and ASR."""
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Single-producer/single-consumer ring of int16 samples.
+    The audio callback copies into preallocated storage (no allocation per block),
+    the ASR thread reads memoryview slices of that storage without copying.
+    Synchronisation is left to the caller's Condition, like the old deque.
+    """
+    def __init__(self, capacity: int, channels: int = 1):
+        if capacity <= 0 or capacity % channels:
+            raise ValueError(f"Invalid ring buffer capacity: {capacity} for {channels} channel(s)")
+        self._channels = channels
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._view = memoryview(self._buf)
+        self._capacity = capacity
+        self._read_pos = 0
+        self._write_pos = 0
+        self._fill = 0
+        self._closed = False
+
+        # Counters
+        self.overruns = 0          # Number of writes that did not fit entirely
+        self.dropped_frames = 0    # Total samples discarded because the buffer was full
+        self.written_frames = 0
+        self.peak_fill = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def available(self) -> int:
+        """Number of samples ready to be read."""
+        return self._fill
+
+    @property
+    def free(self) -> int:
+        """Number of samples that can be written without dropping."""
+        return self._capacity - self._fill
+
+    @property
+    def fill_level(self) -> float:
+        """Fraction of the buffer currently occupied (0.0 - 1.0)."""
+        return self._fill / self._capacity
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        Copy samples into the ring in place. Returns the number of samples stored.
+        When the ring is full the newest samples are dropped so a slice the consumer
+        is currently reading is never overwritten.
+        """
+        samples = samples.reshape(-1)
+        n = samples.shape[0]
+        free = self._capacity - self._fill
+        if n > free:
+            # Keep interleaved frames whole so channels never shift
+            free -= free % self._channels
+            self.overruns += 1
+            self.dropped_frames += n - free
+            n = free
+        if n == 0:
+            return 0
+
+        first = min(n, self._capacity - self._write_pos)
+        self._buf[self._write_pos:self._write_pos + first] = samples[:first]
+        if n > first:
+            self._buf[:n - first] = samples[first:n]
+
+        self._write_pos = (self._write_pos + n) % self._capacity
+        self._fill += n
+        self.written_frames += n
+        if self._fill > self.peak_fill:
+            self.peak_fill = self._fill
+        return n
+
+    def peek(self, max_frames: int) -> memoryview:
+        """
+        Return a zero-copy view of up to max_frames unread samples.
+        The view never spans the wrap point, so it may be shorter than requested.
+        Call consume() with the view length once the data has been processed.
+        """
+        n = min(max_frames, self._fill, self._capacity - self._read_pos)
+        return self._view[self._read_pos:self._read_pos + n]
+
+    def consume(self, frames: int) -> None:
+        """Mark frames samples as read, freeing them for the producer."""
+        frames = min(frames, self._fill)
+        self._read_pos = (self._read_pos + frames) % self._capacity
+        self._fill -= frames
+
+    def clear(self) -> None:
+        """Discard all unread samples."""
+        self._read_pos = self._write_pos
+        self._fill = 0
+
+    def close(self) -> None:
+        """Signal the consumer that no more data will arrive."""
+        self._closed = True
+
+    def reopen(self) -> None:
+        self.clear()
+        self._closed = False
+
+    def stats(self) -> dict:
+        """Snapshot of fill level and overrun counters."""
+        return {
+            "fill": self._fill,
+            "fill_level": round(self.fill_level, 3),
+            "peak_fill": self.peak_fill,
+            "overruns": self.overruns,
+            "dropped_frames": self.dropped_frames,
+            "written_frames": self.written_frames,
+        }
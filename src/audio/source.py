@@ -0,0 +1,138 @@
+"""Audio sources: the interface FlowlApp consumes and a WAV/raw PCM file replay source."""
+
+import os
+import time
+import wave
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable
+import numpy as np
+from utils.logger import logger
+
+
+class AudioSource(ABC):
+    """
+    Produces interleaved int16 blocks of shape (block_frames, channels) through
+    on_audio(block, adc_time=None), adc_time being the PortAudio capture time when known.
+    capture_rate/channels describe the produced format; FlowlApp resamples to settings.rate.
+    A blocking source waits for free space in the ring buffer instead of dropping audio.
+    """
+    blocking = False
+
+    def __init__(self, on_audio: Callable[..., None], settings, capture_rate: int = None, channels: int = 1):
+        self._on_audio = on_audio
+        self.settings = settings
+        self.capture_rate = capture_rate or settings.rate
+        self.channels = channels
+        self.block_frames = round(settings.frames_per_buffer * self.capture_rate / settings.rate)
+
+    @property
+    def device_index(self) -> int | None:
+        """Index of the sounddevice input, None for non-device sources."""
+        return None
+
+    @abstractmethod
+    def start(self) -> None:
+        ...
+
+    @abstractmethod
+    def stop(self) -> None:
+        ...
+
+    @abstractmethod
+    def is_active(self) -> bool:
+        ...
+
+
+class FileAudioSource(AudioSource):
+    """
+    Streams a 16-bit WAV file, or raw int16 PCM, in block_frames chunks from a background thread.
+    realtime=True paces blocks at the recording's rate, realtime=False replays as fast as the
+    pipeline consumes them (the source blocks on a full ring buffer instead of dropping audio).
+    """
+    def __init__(self, on_audio: Callable[..., None], settings, path: str, realtime: bool = True,
+                 raw_rate: int = None, raw_channels: int = 1, on_end: Callable[[], None] = None):
+        self.path = path
+        self.realtime = realtime
+        self.blocking = not realtime
+        self._on_end = on_end
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.finished = threading.Event()
+        self.blocks_sent = 0
+        self.frames_sent = 0
+
+        if os.path.splitext(path)[1].lower() == ".wav":
+            with wave.open(path, "rb") as wav:
+                if wav.getsampwidth() != 2:
+                    raise ValueError(f"Only 16-bit PCM WAV files are supported: {path}")
+                capture_rate, channels = wav.getframerate(), wav.getnchannels()
+            self._data_offset = None
+        else:
+            capture_rate, channels = raw_rate or settings.rate, raw_channels
+            self._data_offset = 0
+
+        super().__init__(on_audio, settings, capture_rate=capture_rate, channels=channels)
+
+    def _blocks(self):
+        """Yield raw int16 blocks of block_frames frames (the last one may be shorter)."""
+        frame_bytes = 2 * self.channels
+        if self._data_offset is None:
+            with wave.open(self.path, "rb") as wav:
+                while True:
+                    data = wav.readframes(self.block_frames)
+                    if not data:
+                        return
+                    yield data
+        else:
+            with open(self.path, "rb") as f:
+                while True:
+                    data = f.read(self.block_frames * frame_bytes)
+                    data = data[:len(data) - len(data) % frame_bytes]
+                    if not data:
+                        return
+                    yield data
+
+    def _run(self) -> None:
+        block_seconds = self.block_frames / self.capture_rate
+        next_time = time.perf_counter()
+        try:
+            for data in self._blocks():
+                if self._stop_event.is_set():
+                    break
+                if self.realtime:
+                    # Deliver each block when it would have been fully captured
+                    next_time += block_seconds
+                    delay = next_time - time.perf_counter()
+                    if delay > 0 and self._stop_event.wait(delay):
+                        break
+                block = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+                self._on_audio(block)
+                self.blocks_sent += 1
+                self.frames_sent += block.shape[0]
+        except Exception as e:
+            logger.error(f"File audio source failed: {e}", "AUDIO")
+        finally:
+            logger.info(f"File audio source finished after {self.blocks_sent} blocks: {self.path}", "AUDIO")
+            self.finished.set()
+            if self._on_end and not self._stop_event.is_set():
+                self._on_end()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info(f"File audio source started: {self.path} ({self.capture_rate} Hz, {self.channels} ch, "
+                    f"{'real-time' if self.realtime else 'max speed'})", "AUDIO")
+
+    def is_active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
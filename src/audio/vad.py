@@ -0,0 +1,84 @@
+"""Voice activity detection used to gate audio before it reaches the recognizer."""
+
+import numpy as np
+from utils.logger import logger
+
+
+class VoiceActivityDetector:
+    """
+    Vectorized frame-level VAD combining short-term energy, zero-crossing rate and
+    spectral flatness, with an adaptive noise floor and a hangover period.
+    process() is called once per audio block and returns the gated speech decision.
+    """
+    FRAME_MS = 20
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._rate = settings.rate
+        self._frame_len = max(1, int(self._rate * self.FRAME_MS / 1000))
+        self._window = np.hanning(self._frame_len).astype(np.float32)
+
+        self._margin_db = float(settings.vad_margin_db)
+        self._flatness_threshold = float(settings.vad_flatness_threshold)
+        self._zcr_threshold = float(settings.vad_zcr_threshold)
+        self._hangover_samples = int(self._rate * settings.vad_hangover_ms / 1000)
+
+        self._noise_floor_db = -60.0
+        self._floor_adapt = 0.05
+        self._hangover_left = 0
+        self.in_speech = False
+
+    def _frame_features(self, samples: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return per-frame energy (dBFS), zero-crossing rate and spectral flatness."""
+        n_frames = samples.shape[0] // self._frame_len
+        frames = samples[:n_frames * self._frame_len].reshape(n_frames, self._frame_len)
+        frames = frames.astype(np.float32) * (1.0 / 32768.0)
+
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2 + 1e-10
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, zcr, flatness
+
+    def process(self, samples: np.ndarray) -> bool:
+        """Classify one block of int16 samples. Returns True while speech (or hangover) is active."""
+        samples = samples.reshape(-1)
+        if samples.shape[0] < self._frame_len:
+            return self.in_speech
+
+        energy_db, zcr, flatness = self._frame_features(samples)
+
+        energetic = energy_db > self._noise_floor_db + self._margin_db
+        tonal = (flatness < self._flatness_threshold) | (zcr < self._zcr_threshold)
+        speech_frames = energetic & tonal
+        block_is_speech = bool(np.count_nonzero(speech_frames) >= 2)
+
+        # Track the noise floor from non-speech frames: fall fast, rise slowly
+        quiet = energy_db[~speech_frames]
+        if quiet.size:
+            quiet_db = float(np.min(quiet))
+            if quiet_db < self._noise_floor_db:
+                self._noise_floor_db = quiet_db
+            else:
+                self._noise_floor_db += self._floor_adapt * (quiet_db - self._noise_floor_db)
+            self._noise_floor_db = max(self._noise_floor_db, -90.0)
+
+        if block_is_speech:
+            self._hangover_left = self._hangover_samples
+        else:
+            self._hangover_left = max(0, self._hangover_left - samples.shape[0])
+
+        was_speech = self.in_speech
+        self.in_speech = block_is_speech or self._hangover_left > 0
+        if self.in_speech != was_speech:
+            logger.debug(f"VAD {'speech start' if self.in_speech else 'speech end'} "
+                         f"(noise floor {self._noise_floor_db:.1f} dBFS)", "VAD")
+        return self.in_speech
+
+    def reset(self) -> None:
+        """Forget the speech state, keeping the learned noise floor."""
+        self._hangover_left = 0
+        self.in_speech = False
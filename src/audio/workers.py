@@ -4,15 +4,21 @@ import threading
 import time
 import json
 from collections import deque
+import numpy as np
 
+from audio.ring_buffer import AudioRingBuffer
+from audio.vad import VoiceActivityDetector
+from audio.denoiser import SpectralGateDenoiser
+from audio.resampler import StreamResampler
+from utils.cpu_policy import pin_current_thread, placement
 from utils.utils import filter_partial, exec_time_wrap
 from utils.logger import logger
 
 
 class ASRWorker(threading.Thread):
-    def __init__(self, audio_q: deque, events_q: deque, recognizer, audio_lock: threading.Condition, events_lock: threading.Condition, settings):
+    def __init__(self, audio_buffer: AudioRingBuffer, events_q: deque, recognizer, audio_lock: threading.Condition, events_lock: threading.Condition, settings, vad: VoiceActivityDetector = None, noise_reducer: SpectralGateDenoiser = None, resampler: StreamResampler = None):
         super().__init__(daemon=True)
-        self._audio_q = audio_q
+        self._audio_buffer = audio_buffer
         self._events_q = events_q
         self._rec = recognizer
         self._prev_partial = ""
@@ -21,8 +27,23 @@ class ASRWorker(threading.Thread):
         self.settings = settings
         self._events_lock = events_lock
 
-    def generate_final_result(self, data: bytes) -> None:
-            res = json.loads(self._rec.Result())
+        # Voice activity gating: silent blocks skip the recognizer and are kept as pre-roll
+        self._vad = vad
+        self._in_speech = False
+        preroll_blocks = -(-settings.vad_preroll_ms * settings.rate // (1000 * settings.frames_per_buffer))
+        self._preroll: deque[bytes] = deque(maxlen=max(1, preroll_blocks))
+        self._skipped_blocks = 0
+
+        self._noise_reducer = noise_reducer
+
+        # Native-rate capture: resampled output is regrouped into frames_per_buffer blocks
+        self._resampler = resampler
+        self._resampled = np.zeros(0, dtype=np.int16)
+        self._pending_input = None  # (audio_buffer, resampler) handed over by FlowlApp.switch_device
+
+    def generate_final_result(self, data: bytes, force: bool = False) -> None:
+            # FinalResult() flushes the decoder when the VAD detects the end of speech
+            res = json.loads(self._rec.FinalResult() if force else self._rec.Result())
             final_text = res.get("text", "").strip()
 
             if final_text:
@@ -50,44 +71,180 @@ class ASRWorker(threading.Thread):
         self._prev_partial = partial_text
 
 
+    def _accept(self, data: bytes) -> None:
+        if self._rec.AcceptWaveform(data):
+            self.generate_final_result(data)
+        else:
+            self.generate_partial_result(data)
+
+    def _process_chunk(self, view: memoryview) -> None:
+        samples = np.frombuffer(view, dtype=np.int16)
+        chunk = self.settings.frames_per_buffer
+        if self._resampler is None and samples.shape[0] == chunk and not self._resampled.shape[0]:
+            self._process_samples(samples)
+            return
+
+        # Resampled output, or a short read at the end of the stream, is regrouped into whole blocks
+        if self._resampler is not None:
+            samples = self._resampler.process(samples)
+        self._resampled = np.concatenate((self._resampled, samples))
+        while self._resampled.shape[0] >= chunk:
+            block, self._resampled = self._resampled[:chunk], self._resampled[chunk:]
+            self._process_samples(block)
+
+    def _flush_tail(self) -> None:
+        """End of stream: feed the samples short of a whole block to Vosk and emit the last final."""
+        tail, self._resampled = self._resampled, np.zeros(0, dtype=np.int16)
+        try:
+            if tail.shape[0] and (self._vad is None or self._in_speech):
+                self._accept(tail.tobytes())
+            self.generate_final_result(b"", force=True)
+        except Exception as e:
+            logger.error(f"ASR ERROR: {e}", "ASR")
+
+    def _process_samples(self, samples: np.ndarray) -> None:
+        if self._noise_reducer is not None:
+            samples = self._noise_reducer.process(samples)
+
+        # Vosk's cffi binding only accepts bytes, so this is the single copy on the ASR side
+        data = samples.tobytes()
+        if self._vad is None:
+            self._accept(data)
+            return
+
+        if self._vad.process(samples):
+            if not self._in_speech:
+                # Speech onset: replay the pre-roll so the first word is not clipped
+                self._in_speech = True
+                while self._preroll:
+                    self._accept(self._preroll.popleft())
+            self._accept(data)
+        else:
+            if self._in_speech:
+                self._in_speech = False
+                self.generate_final_result(data, force=True)
+            self._preroll.append(data)
+            self._skipped_blocks += 1
+
+    def swap_input(self, audio_buffer: AudioRingBuffer, resampler: StreamResampler = None) -> None:
+        """Queue a new input buffer/resampler; applied between chunks. Call with audio_lock held."""
+        self._pending_input = (audio_buffer, resampler)
+
+    def _apply_input(self, audio_buffer: AudioRingBuffer, resampler: StreamResampler) -> None:
+        # Whatever was heard on the previous device becomes a final, then the stream state restarts
+        self.generate_final_result(b"", force=True)
+        self._audio_buffer = audio_buffer
+        self._resampler = resampler
+        self._resampled = np.zeros(0, dtype=np.int16)
+        self._preroll.clear()
+        self._in_speech = False
+        if self._vad is not None:
+            self._vad.reset()
+        if self._noise_reducer is not None:
+            self._noise_reducer.reset()
+        logger.info("ASR input switched to new audio source", "ASR")
+
+    def _input_chunk(self) -> int:
+        chunk = self.settings.frames_per_buffer
+        if self._resampler is not None:
+            chunk = self._resampler.input_frames_for(chunk) * self._resampler.channels
+        return chunk
+
     def run(self) -> None:
+        if self.settings.pin_threads:
+            pin_current_thread(placement(self.settings)[0], "ASR")
         while True:
-            try:
-                with self._audio_lock:
-                    while not self._audio_q:
-                        self._audio_lock.wait()
-                    data = self._audio_q.popleft()
-
-                if data is None:
-                    logger.info("ASR worker exiting", "ASR")
+            pending = None
+            with self._audio_lock:
+                chunk = self._input_chunk()
+                while (self._audio_buffer.available < chunk and not self._audio_buffer.closed
+                       and self._pending_input is None):
+                    self._audio_lock.wait()
+                if self._pending_input is not None:
+                    pending, self._pending_input = self._pending_input, None
+                elif self._audio_buffer.closed and not self._audio_buffer.available:
+                    self._flush_tail()
+                    logger.info(f"ASR worker exiting, audio buffer stats: {self._audio_buffer.stats()}, "
+                                f"VAD skipped blocks: {self._skipped_blocks}", "ASR")
+                    if self._noise_reducer is not None:
+                        logger.info(f"Noise reduction cost: {self._noise_reducer.cost_per_second() * 1000:.2f} ms "
+                                    f"per second of audio", "ASR")
+                    if self._resampler is not None:
+                        logger.info(f"Resampler cost: {self._resampler.cost_per_block_ms():.3f} ms per block "
+                                    f"(max {self._resampler.max_block_seconds * 1000:.3f} ms)", "ASR")
                     break
-            except IndexError:
-                # This shouldn't happen with correct Condition logic, but good for safety
+                else:
+                    # Zero-copy slice of the ring; the producer never writes into unread samples.
+                    # Once the ring is closed this drains what is left, including a last partial chunk.
+                    buffer = self._audio_buffer
+                    view = buffer.peek(chunk)
+
+            if pending is not None:
+                try:
+                    self._apply_input(*pending)
+                except Exception as e:
+                    logger.error(f"ASR input switch error: {e}", "ASR")
                 continue
 
             try:
-                if self._rec.AcceptWaveform(data):
-                    self.generate_final_result(data)
-                else:
-                    self.generate_partial_result(data)
+                self._process_chunk(view)
             except Exception as e:
                 logger.error(f"ASR ERROR: {e}", "ASR")
+            finally:
+                with self._audio_lock:
+                    buffer.consume(len(view))
+                    # Wake a blocking source waiting for free space
+                    self._audio_lock.notify_all()
+                view.release()
 
 
 class MTWorker(threading.Thread):
-    def __init__(self, events_q: deque, translate_fn, events_lock: threading.Condition, ui_callback=None, settings=None):
+    def __init__(self, events_q: deque, translate_fn, events_lock: threading.Condition, ui_callback=None, settings=None,
+                 ready: threading.Event = None, translate_batch_fn=None, translate_partial_fn=None,
+                 translate_stream_fn=None, translate_commit_fn=None):
         super().__init__(daemon=True)
         self._events_q = events_q
         self._translate = translate_fn
+        # Batched translation; falls back to one call per text
+        self._translate_batch = translate_batch_fn or (lambda texts: [translate_fn(t) for t in texts])
+        # Partials may reuse the previous partial's decoding state and are cancelled once superseded
+        self._translate_partial = translate_partial_fn or (lambda text, is_cancelled=None: translate_fn(text))
+        # Committed prefixes are display-only fragments, translated apart from (and never cached as) finals
+        self._translate_commit = translate_commit_fn or (lambda text: self._translate_partial(text))
+        # translate_stream_fn(text, on_text) reports the translation word by word while decoding
+        self._translate_stream = translate_stream_fn
+        self._stream_first_word = None
         self._events_lock = events_lock
+        # Until the MT model is ready, finals are held back and partials dropped
+        self._ready = ready
+        self._backlog: list[str] = []
         self._last_emit_time = 0.0
         self._last_shown_partial = ""
         self._ui_callback = ui_callback  # Callback for UI updates
         self.settings = settings
 
-    def output_final_result(self, text) -> None:
-        if not text:
-            return
+        # Stable-prefix state for the current utterance: committed source words and their translation
+        self._recent_partials = deque(maxlen=max(1, settings.mt_agreement_n))
+        self._committed: list[str] = []
+        self._committed_translated = ""
+        self.translated_words = 0  # Source words sent to MT, to compare commit policies
+        self.cancelled_partials = 0
+
+    def _reset_commit(self) -> None:
+        self._recent_partials.clear()
+        self._committed = []
+        self._committed_translated = ""
+
+    def _prepare_final(self, text: str, now: float) -> list[tuple]:
+        """Jobs for a final result, resetting partial state."""
+        if self.settings.mt_stable_prefix and self._committed:
+            # The committed translation was only for display: the final is translated as one sentence
+            self._reset_commit()
+            self._last_emit_time = 0
+            self._last_shown_partial = ""
+            return [("final", text, now)]
+        self._reset_commit()
+
         final_text_sliced = ""
         partial_text_sliced = ""
         
@@ -105,87 +262,241 @@ class MTWorker(threading.Thread):
         except (IndexError, ValueError):
             pass
 
-        if final_text_sliced != partial_text_sliced and len(final_text_sliced) >= self.settings.min_part_chars:
-            try:
-                translated_text = self._translate(final_text_sliced)
-                if self._ui_callback:
-                    self._ui_callback("final", {
-                        "original": final_text_sliced,
-                        "translated": translated_text,
-                        "timestamp": time.time()
-                    })
-                else:
-                    logger.info(f"Final translation: {final_text_sliced} --> {translated_text}", "MT")
-            except Exception as e:
-                if self._ui_callback:
-                    self._ui_callback("error", {
-                        "type": "translation_error",
-                        "message": str(e),
-                        "original": final_text_sliced,
-                        "timestamp": time.time()
-                    })
-                else:
-                    logger.error(f"Final translation error: {final_text_sliced} --> {e}", "MT")
-
         self._last_emit_time = 0
         self._last_shown_partial = ""
 
+        if final_text_sliced != partial_text_sliced and len(final_text_sliced) >= self.settings.min_part_chars:
+            return [("final", final_text_sliced, now)]
+        return []
 
-    def output_partial_result(self, text: str) -> None:
-        now = time.time() * 1000.0
+    def _prepare_partial(self, text: str, now: float) -> list[tuple]:
+        """Jobs for a partial result; none if it is throttled or not worth showing."""
         if now - self._last_emit_time < self.settings.throttle_ms:
-            return
+            return []
 
         if text == self._last_shown_partial:
-            return
+            return []
 
         if len(text) < self.settings.min_part_chars and len(text.split()) < self.settings.min_part_words:
+            return []
+
+        if not self.settings.mt_stable_prefix:
+            return [("partial", filter_partial(text, self.settings.max_part_words), now)]
+
+        # Local agreement: words on which the last N partials agree are stable, translate them once
+        words = text.split()
+        if words[:len(self._committed)] != self._committed:
+            # ASR revised text that was already committed: start the utterance over
+            self._reset_commit()
+        self._recent_partials.append(words)
+
+        jobs = []
+        if len(self._recent_partials) == self._recent_partials.maxlen:
+            agreed = 0
+            shortest = min(len(partial) for partial in self._recent_partials)
+            while agreed < shortest and all(p[agreed] == words[agreed] for p in self._recent_partials):
+                agreed += 1
+            if agreed - len(self._committed) >= self.settings.mt_commit_min_words:
+                jobs.append(("commit", " ".join(words[len(self._committed):agreed]), now))
+                self._committed = words[:agreed]
+
+        tail = " ".join(words[len(self._committed):])
+        jobs.append(("partial", filter_partial(tail, self.settings.max_part_words), now))
+        return jobs
+
+    def _emit(self, job: tuple, translated: str) -> None:
+        text_type, text, now = job
+        if text_type == "commit":
+            self._committed_translated = " ".join(filter(None, (self._committed_translated, translated)))
             return
 
-        text = filter_partial(text, self.settings.max_part_words)
-        try:
-            translated_partial = self._translate(text)
-            # Send structured event to UI instead of printing
+        if text_type == "final":
             if self._ui_callback:
-                self._ui_callback("partial", {
+                self._ui_callback("final", {
                     "original": text,
-                    "translated": translated_partial,
-                    "timestamp": now
+                    "translated": translated,
+                    "timestamp": time.time()
                 })
             else:
-                logger.info(f"Partial translation: {text} --> {translated_partial}", "MT")
-            self._last_emit_time = now
-            self._last_shown_partial = text
-        except Exception as e:
+                logger.info(f"Final translation: {text} --> {translated}", "MT")
+        else:
+            data = {
+                "original": text,
+                "translated": translated,
+                "timestamp": now
+            }
+            committed = " ".join(self._committed)
+            if self.settings.mt_stable_prefix:
+                # The UI shows committed prefix + this tail instead of accumulating words itself
+                data["committed_original"] = committed
+                data["committed_translated"] = self._committed_translated
+            # Send structured event to UI instead of printing
             if self._ui_callback:
-                self._ui_callback("error", {
-                    "type": "partial_translation_error",
-                    "message": str(e),
-                    "original": text,
-                    "timestamp": now
-                })
+                self._ui_callback("partial", data)
             else:
-                logger.error(f"Partial translation error: {e}", "MT")
-        
+                logger.info(f"Partial translation: {committed} [{text}] --> "
+                            f"{self._committed_translated} [{translated}]", "MT")
+            self._last_emit_time = now
+            self._last_shown_partial = " ".join(filter(None, (committed, text)))
 
-    def run(self) -> None:
-        while True:
+    def _emit_error(self, text_type: str, text: str, error: Exception, now: float) -> None:
+        if self._ui_callback:
+            self._ui_callback("error", {
+                "type": "translation_error" if text_type == "final" else "partial_translation_error",
+                "message": str(error),
+                "original": text,
+                "timestamp": time.time() if text_type == "final" else now
+            })
+        else:
+            logger.error(f"{text_type.capitalize()} translation error: {text} --> {error}", "MT")
+
+    def process_batch(self, events: list[tuple[str, str]]) -> None:
+        """Translate a batch of ASR events (finals in one batched MT call) and emit in order."""
+        jobs = []
+        for i, (text_type, text) in enumerate(events):
+            if not text:
+                continue
+            now = time.time() * 1000.0
+            if text_type == "final":
+                jobs.extend(self._prepare_final(text, now))
+            elif i == len(events) - 1:
+                jobs.extend(self._prepare_partial(text, now))
+            # Other partials are superseded by a newer event in the same batch and never shown
+
+        if not jobs:
+            return
+        # Streaming needs a batch of one: only a lone final is streamed, several finals stay micro-batched
+        finals = sum(1 for text_type, text, _ in jobs if text_type == "final" and text)
+        stream = self._translate_stream is not None and self.settings.mt_stream_finals and finals == 1
+        try:
+            # Finals are whole sentences: batch them (and keep them in the translation memory)
+            batched = [text for text_type, text, _ in jobs if text and text_type == "final" and not stream]
+            batched = self._translate_batch(batched) if batched else []
+        except Exception as e:
+            self._reset_commit()
+            for text_type, text, now in jobs:
+                self._emit_error(text_type, text, e, now)
+            return
+        self.translated_words += sum(len(job[1].split()) for job in jobs)
+
+        for index, job in enumerate(jobs):
+            text_type, text, now = job
             try:
-                with self._events_lock:
-                    while not self._events_q:
-                        self._events_lock.wait()
-                    text_type, text = self._events_q.popleft()
-            except IndexError:
+                if not text:
+                    translated = ""
+                elif text_type == "commit":
+                    translated = self._translate_commit(text)
+                elif text_type == "partial":
+                    # Any queued event (newer partial or final) makes this partial stale
+                    translated = self._translate_partial(text, is_cancelled=self._superseded)
+                elif text_type == "final" and stream:
+                    start = time.perf_counter()
+                    self._stream_first_word = None
+                    translated = self._translate_stream(text, lambda so_far, job=job: self._emit_stream(job, so_far))
+                    if self._stream_first_word is not None:
+                        logger.debug(f"Final streamed: first word after {(self._stream_first_word - start) * 1000:.0f} ms, "
+                                     f"complete after {(time.perf_counter() - start) * 1000:.0f} ms", "MT")
+                else:
+                    translated = batched.pop(0)
+            except Exception as e:
+                self._reset_commit()
+                for text_type, text, now in jobs[index:]:
+                    self._emit_error(text_type, text, e, now)
+                return
+            if translated is None:
+                self.cancelled_partials += 1
                 continue
+            self._emit(job, translated)
 
-            if text_type == "final":
-                if text is None:
-                    logger.info("MT worker exiting", "MT")
+    def _emit_stream(self, job: tuple, translated_so_far: str) -> None:
+        """Show a final's translation while it is being decoded (whole words only)."""
+        if self._stream_first_word is None:
+            self._stream_first_word = time.perf_counter()
+        if not self._ui_callback:
+            return
+        _, text, now = job
+        self._ui_callback("stream", {
+            "original": text,
+            "translated": translated_so_far,
+            # The final is streamed whole, so the UI must not accumulate it onto the shown partial
+            "committed_original": "",
+            "committed_translated": "",
+            "timestamp": now
+        })
+
+    def _superseded(self) -> bool:
+        # Read without the lock: a stale answer only delays the cancel by one decoding step
+        return bool(self._events_q)
+
+    def output_final_result(self, text) -> None:
+        self.process_batch([("final", text)])
+
+    def output_partial_result(self, text: str) -> None:
+        self.process_batch([("partial", text)])
+
+    def _mt_ready(self) -> bool:
+        return self._ready is None or self._ready.is_set()
+
+    def _next_event(self) -> tuple[str, str] | None:
+        """Block for the next event; returns None when the backlog should be flushed instead."""
+        with self._events_lock:
+            while not self._events_q:
+                if self._backlog:
+                    # Poll so the backlog is flushed as soon as MT becomes ready
+                    self._events_lock.wait(0.1)
+                    if self._mt_ready():
+                        break
+                else:
+                    self._events_lock.wait()
+            if not self._events_q:
+                return None
+            return self._events_q.popleft()
+
+    def _collect_batch(self, first: tuple[str, str]) -> list[tuple[str, str]]:
+        """Gather events arriving within the batch window, up to the maximum batch size."""
+        batch = [first]
+        if first == ("final", None):
+            return batch
+        deadline = time.perf_counter() + self.settings.mt_batch_window_ms / 1000.0
+        with self._events_lock:
+            while len(batch) < self.settings.mt_max_batch:
+                remaining = deadline - time.perf_counter()
+                while not self._events_q and remaining > 0:
+                    self._events_lock.wait(remaining)
+                    remaining = deadline - time.perf_counter()
+                if not self._events_q:
                     break
-                self.output_final_result(text)
+                event = self._events_q.popleft()
+                batch.append(event)
+                if event == ("final", None):
+                    break
+        return batch
+
+    def run(self) -> None:
+        if self.settings.pin_threads:
+            pin_current_thread(placement(self.settings)[1], "MT")
+        while True:
+            if self._backlog and self._mt_ready():
+                logger.info(f"MT ready, translating {len(self._backlog)} queued finals", "MT")
+                backlog, self._backlog = self._backlog, []
+                for i in range(0, len(backlog), self.settings.mt_max_batch):
+                    self.process_batch([("final", text) for text in backlog[i:i + self.settings.mt_max_batch]])
 
-            elif text_type == "partial":
-                self.output_partial_result(text)
+            event = self._next_event()
+            if event is None:
+                continue
+            batch = self._collect_batch(event)
 
+            exiting = batch[-1] == ("final", None)
+            if exiting:
+                batch.pop()
 
-            
+            if not self._mt_ready():
+                self._backlog.extend(text for text_type, text in batch if text_type == "final")
+            elif batch:
+                self.process_batch(batch)
+
+            if exiting:
+                logger.info(f"MT worker exiting, {self.translated_words} source words translated, "
+                            f"{self.cancelled_partials} superseded partials cancelled", "MT")
+                break
@@ -0,0 +1,74 @@
+"""Headless pipeline runner: replays recorded audio through ASR -> MT without a UI or microphone.
+
+Accepts WAV, raw int16 PCM, or .flrec session recordings (replayed with their original chunking and timing).
+"""
+
+import argparse
+import threading
+import time
+
+from app import FlowlApp
+from utils.settings import SettingsManager
+from utils.logger import logger
+
+
+class ReplayStats:
+    """Collects translation events emitted by MTWorker."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.counts = {"final": 0, "partial": 0, "error": 0}
+        self.first_event = None
+        self._lock = threading.Lock()
+
+    def on_event(self, event_type: str, data: dict) -> None:
+        now = time.perf_counter() - self.start
+        with self._lock:
+            self.counts[event_type] = self.counts.get(event_type, 0) + 1
+            if self.first_event is None:
+                self.first_event = now
+        if event_type == "final":
+            logger.info(f"[{now:7.2f}s] {data.get('original')} --> {data.get('translated')}", "REPLAY")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", help="WAV file, raw int16 PCM file or .flrec session recording")
+    parser.add_argument("--max-speed", action="store_true", help="Replay unthrottled instead of in real time")
+    parser.add_argument("--rate", type=int, default=None, help="Sample rate of a raw PCM file")
+    parser.add_argument("--channels", type=int, default=1, help="Channel count of a raw PCM file")
+    parser.add_argument("--config", default="config.json", help="Settings file to start from")
+    args = parser.parse_args()
+
+    settings = SettingsManager.load_from_file(args.config)
+    settings.audio_source = "file"
+    settings.audio_file_path = args.file
+    settings.audio_file_realtime = not args.max_speed
+    settings.audio_file_rate = args.rate
+    settings.audio_file_channels = args.channels
+
+    stats = ReplayStats()
+    app = FlowlApp(ui_callback=stats.on_event, settings=settings)
+    source = app.audio_engine
+
+    stats.start = time.perf_counter()
+    app.start()
+    source.finished.wait()
+
+    # End of input: ASR drains the ring (including a last partial block) and exits, then MT catches up
+    app.finish_input()
+    app.asr.join()
+    while app.events_q:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - stats.start
+    app.stop()
+
+    audio_seconds = source.frames_sent / source.capture_rate
+    logger.info(f"Replayed {audio_seconds:.1f}s of audio in {elapsed:.1f}s "
+                f"(real-time factor {elapsed / audio_seconds if audio_seconds else 0:.3f})", "REPLAY")
+    logger.info(f"Events: {stats.counts}, first event after "
+                f"{stats.first_event if stats.first_event is not None else float('nan'):.2f}s", "REPLAY")
+    logger.info(f"Audio buffer: {app.audio_buffer.stats()}", "REPLAY")
+
+
+if __name__ == "__main__":
+    main()
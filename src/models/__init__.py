@@ -1,3 +1,9 @@
 from .bundle import ModelBundle
+from .mt_backends import MTBackend, TorchBackend, OnnxBackend, create_mt_backend
+from .registry import ModelRegistry, model_registry
+from .translation_cache import TranslationCache
+from .translation_memory import TranslationMemory
+from .vocab_trim import TrimmedTokenizer, prepare_trimmed_model
 
-__all__ = [ModelBundle]
\ No newline at end of file
+__all__ = [ModelBundle, MTBackend, TorchBackend, OnnxBackend, create_mt_backend, ModelRegistry, model_registry,
+           TranslationCache, TranslationMemory, TrimmedTokenizer, prepare_trimmed_model]
\ No newline at end of file
@@ -1,97 +1,401 @@
 """Models bundle: ASR (Vosk) and MT (Transformers)."""
 
-import torch
+import threading
+import time
 # from noisereduce.torchgate import TorchGate as TG
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
-from collections import OrderedDict
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 from vosk import Model, KaldiRecognizer
 
-from utils.utils import exec_time_wrap
+from audio.denoiser import SpectralGateDenoiser
+from .mt_backends import GenerationBudget, MTBackend, PrefixState, create_mt_backend
+from .registry import model_registry, directory_size
+from .translation_memory import TranslationMemory
+from utils.cpu_policy import autotune_mt_threads, configure_torch_threads, pin_current_thread, placement, split_cores
+from utils.settings import SettingsManager, split_engine
+from utils.utils import exec_time_wrap, perf_note
 from utils.logger import logger
 
 
 class ModelBundle:
-    def __init__(self, settings):
+    """
+    Loads the Vosk model and the MT backend (torch or ONNX Runtime) in parallel background threads.
+    torch and transformers are only imported by the MT loader, so Vosk (and with it
+    audio capture and ASR) is usually ready well before MT. `recognizer` blocks until
+    Vosk is loaded; `mt_ready` is set once MT is loaded and warmed up (or failed).
+    An optional second MT slot (mt_partial_model_paths) serves partials only; finals always
+    use the main model, whose cached translations also take precedence for partials.
+    An optional draft model (mt_draft_model_paths) speeds up finals through assisted decoding.
+    """
+    AUTOTUNE_TEXTS = [
+        "Hello, how are you?",
+        "I think we should move the meeting to Thursday afternoon.",
+        "Please share your screen so everyone can see it.",
+    ]
+
+    def __init__(self, settings, on_progress: Callable[[str], None] = None):
         self.settings = settings
-        # Simple cache to avoid re-translating identical text
-        self._translation_cache = OrderedDict()
-        self._max_cache_size = 100    
+        # Translation memory shared across bundles (and, on disk, across sessions)
+        self._memory = TranslationMemory.shared(
+            self.settings.translation_memory_path if self.settings.translation_memory else None,
+            self.settings.translation_cache_mb * 1024 ** 2, self.settings.translation_filler_words)
+        self._pair = f"{self.settings.from_code}-{self.settings.to_code}"
+        self._model_id = f"{self.settings.mt_engine}:{self.settings.mt_model_path}"
+        self._partial_spec = split_engine(self.settings.mt_partial_model_spec)
+        self._partial_model_id = ":".join(self._partial_spec)
         self._tg = None
-        # Try to load on GPU for much faster inference
+        if self.settings.noise_reduction:
+            try:
+                self._tg = SpectralGateDenoiser(self.settings)
+            except ValueError as e:
+                logger.warning(f"Noise reduction disabled: {e}", "MODELS")
+        self._device = "cpu"
+        self._on_progress = on_progress
+        self._start_time = time.perf_counter()
+
+        # Models come from the process-wide registry so restarts and language swaps reuse them
+        model_registry.budget_bytes = self.settings.model_cache_mb * 1024 ** 2
+        self._registry_keys = []
+        self._keys_lock = threading.Lock()
+
+        self._recognizer = None
+        self._mt: MTBackend = None
+        self._mt_error = None
+        self.mt_ready = threading.Event()
+        # Optional separate model for partials; until it is loaded (or if it fails) partials use the final model
+        self._partial_mt: MTBackend = None
+        self.partial_mt_ready = threading.Event()
+        # (backend, state) of the last partial, for decoder prefix reuse within the same model
+        self._partial_state: tuple[MTBackend, PrefixState] = (None, None)
+        # Draft model for speculative decoding of finals; None until loaded and checked against the main model
+        self._draft_mt: MTBackend = None
+        self.deadline_truncations = 0
+        # Backends are not thread-safe; held around every MT call (uncontended except during autotune)
+        self._mt_lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="model-load")
+        self._asr_future = self._executor.submit(self._load_asr)
+        self._mt_future = self._executor.submit(self._load_mt_stage)
+        self._partial_future = None
+        if self._partial_model_id != self._model_id:
+            self._partial_future = self._executor.submit(self._load_partial_stage)
+        self._draft_future = None
+        if self.settings.mt_draft_model_spec:
+            self._draft_future = self._executor.submit(self._load_draft_stage)
+        self._executor.shutdown(wait=False)
+
+    def _progress(self, message: str) -> None:
+        logger.info(f"{message} (+{time.perf_counter() - self._start_time:.2f}s)", "MODELS")
+        if self._on_progress:
+            try:
+                self._on_progress(message)
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {e}", "MODELS")
+
+    def _acquire(self, key: tuple, loader, size_fn):
+        value = model_registry.acquire(key, loader, size_fn)
+        with self._keys_lock:
+            self._registry_keys.append(key)
+        return value
+
+    def _load_asr(self) -> None:
+        model_path = self.settings.model_path
+        self._progress(f"Loading ASR model from: {model_path}")
         try:
-            self._device = "cuda" if torch.cuda.is_available() else "cpu"
-            logger.info(f"Using device: {self._device}", "MODELS")
+            asr_model = self._acquire(("vosk", model_path), lambda: Model(model_path),
+                                      lambda _: directory_size(model_path))
+            self._recognizer = KaldiRecognizer(asr_model, self.settings.rate)
         except Exception as e:
-            logger.warning(f"Failed to load torch: {e}, using CPU", "MODELS")
-            self._device = "cpu"
+            raise RuntimeError(f"Failed to load ASR model from {model_path}: {e}")
+        self._progress("ASR model loaded successfully")
 
+    def _load_mt_stage(self) -> None:
+        engine, mt_model_path = self.settings.mt_engine, self.settings.mt_model_path
+        if self.settings.pin_threads:
+            # torch's intra-op pool is created from this thread and inherits its affinity
+            pin_current_thread(placement(self.settings)[1], "MT loader")
         try:
-            model_path = self.settings.model_path
-            logger.info(f"Loading ASR model from: {model_path}", "MODELS")
-            self._asr_model = Model(model_path)
-            self.recognizer = KaldiRecognizer(self._asr_model, self.settings.rate)
-            logger.info("ASR model loaded successfully", "MODELS")
+            self._progress(f"Loading MT model: {mt_model_path} ({engine})")
+            self._mt = self._acquire(("mt", engine, mt_model_path), lambda: self._load_mt(engine, mt_model_path),
+                                     lambda backend: backend.size_bytes())
+            self._device = self._mt.device
+            self._progress(f"MT model loaded successfully on {self._device}")
         except Exception as e:
-            raise RuntimeError(f"Failed to load ASR model from {self.settings.model_path}: {e}")
-        
+            self._mt_error = RuntimeError(f"Failed to load MT model {mt_model_path}: {e}")
+            logger.error(str(self._mt_error), "MODELS")
+        finally:
+            self.mt_ready.set()
+        # After mt_ready, so the first subtitles never wait for it
+        if self._mt_error is None and self.settings.thread_autotune and not self.settings.mt_threads:
+            try:
+                self._autotune_threads(self._mt)
+            except Exception as e:
+                logger.warning(f"MT thread autotune failed: {e}", "MODELS")
+
+    def _load_partial_stage(self) -> None:
+        engine, path = self._partial_spec
+        if self.settings.pin_threads:
+            pin_current_thread(placement(self.settings)[1], "MT loader")
+        try:
+            self._progress(f"Loading partials MT model: {path} ({engine})")
+            self._partial_mt = self._acquire(("mt", engine, path), lambda: self._load_mt(engine, path),
+                                             lambda backend: backend.size_bytes())
+            self._progress("Partials MT model loaded successfully")
+        except Exception as e:
+            logger.warning(f"Failed to load partials MT model {path}: {e}, partials use the final model", "MODELS")
+        finally:
+            self.partial_mt_ready.set()
+
+    def _load_draft_stage(self) -> None:
+        engine, path = split_engine(self.settings.mt_draft_model_spec)
+        if self.settings.pin_threads:
+            pin_current_thread(placement(self.settings)[1], "MT loader")
         try:
-            mt_model_path = self.settings.mt_model_path
-            logger.info(f"Loading MT model: {mt_model_path}", "MODELS")
-            self._tokenizer = AutoTokenizer.from_pretrained(mt_model_path)
-            
-            self._mt_model = AutoModelForSeq2SeqLM.from_pretrained(
-                mt_model_path,
-                dtype=torch.float16 if self._device == "cuda" else torch.float32
-            ).to(self._device)
-            
-            # Enable evaluation mode for faster inference
-            self._mt_model.eval()
-            logger.info(f"MT model loaded successfully on {self._device}", "MODELS")
+            self._progress(f"Loading draft MT model: {path} ({engine})")
+            draft = self._acquire(("mt", engine, path), lambda: self._load_mt(engine, path),
+                                  lambda backend: backend.size_bytes())
         except Exception as e:
-            raise RuntimeError(f"Failed to load MT model {self.settings.mt_model_path}: {e}")
+            logger.warning(f"Failed to load draft MT model {path}: {e}, finals decode without it", "MODELS")
+            return
+        self.mt_ready.wait()
+        if self._mt_error is None and self._mt.accepts_draft(draft):
+            self._draft_mt = draft
+            self._progress("Draft MT model loaded, finals use speculative decoding")
+        elif self._mt_error is None:
+            logger.warning(f"Draft MT model {path} does not match {self.settings.mt_model_path} "
+                           f"(engine, device or vocabulary), finals decode without it", "MODELS")
+
+    def _load_mt(self, engine: str, mt_model_path: str) -> MTBackend:
+        # torch/transformers (and onnxruntime) are only imported here, off the ASR loading path
+        backend = create_mt_backend(engine, mt_model_path, self.settings)
+        threads = configure_torch_threads(self.settings)
+        logger.info(f"MT intra-op threads: {threads}", "MODELS")
+        backend.load()
+        if self.settings.mt_warmup:
+            backend.warmup()
+        return backend
 
+    def _autotune_threads(self, backend: MTBackend) -> None:
+        """
+        Pick mt_threads from a short benchmark and record it (and the core split) in the config file.
+        Runs on the loader thread while MT is live: each timed decode takes the MT lock, so the MT
+        thread waits for at most one of them.
+        """
+        if backend.device != "cpu" or not backend.uses_torch_threads:
+            return
+        self._progress("Tuning MT thread count")
+
+        def translate_batch(texts: list[str]) -> list[str]:
+            with self._mt_lock:
+                return backend.translate_batch(texts)
+
+        threads, timings = autotune_mt_threads(translate_batch, self.AUTOTUNE_TEXTS)
+        logger.info(f"MT thread autotune: {', '.join(f'{t}: {ms:.0f} ms' for t, ms in timings.items())} "
+                    f"-> {threads} threads", "MODELS")
+
+        result = {"mt_threads": threads}
+        if self.settings.pin_threads and not (self.settings.asr_cores or self.settings.mt_cores):
+            result["asr_cores"], result["mt_cores"] = split_cores(threads)
+        self.settings.update_from_dict(result)
+        configure_torch_threads(self.settings)
+        # Only the tuned fields are written so other unsaved settings are not persisted behind the UI's back
+        persisted = SettingsManager.load_from_file(self.settings.config_path)
+        persisted.update_from_dict(result)
+        persisted.save_to_file()
+
+    @property
+    def recognizer(self):
+        """Vosk recognizer; blocks until the ASR model is loaded and re-raises load errors."""
+        self._asr_future.result()
+        return self._recognizer
+
+    def wait_mt(self, timeout: float = None) -> bool:
+        """Wait until MT loading has finished (successfully or not)."""
+        return self.mt_ready.wait(timeout)
+
+    def close(self) -> None:
+        """Release this bundle's models back to the registry (they stay cached until evicted)."""
+        # Let in-flight loads finish so their references are released too
+        for future in (self._asr_future, self._mt_future, self._partial_future, self._draft_future):
+            if future is None:
+                continue
+            try:
+                future.result()
+            except Exception:
+                pass
+        with self._keys_lock:
+            keys, self._registry_keys = self._registry_keys, []
+        for key in keys:
+            model_registry.release(key)
+        self.flush_translations()
+        logger.debug(f"Model registry: {model_registry.stats()}", "MODELS")
+
+
+    def _budget(self, partial: bool = False) -> GenerationBudget:
+        """Length cap and deadline for one decode; the deadline starts now."""
+        settings = self.settings
+        return GenerationBudget(settings.mt_length_ratio, settings.mt_length_margin, settings.mt_max_new_tokens,
+                                settings.mt_partial_deadline_ms if partial else settings.mt_final_deadline_ms)
+
+    def _truncated(self, budget: GenerationBudget, kind: str, text: str) -> bool:
+        """Report a decode the deadline cut short; such translations are shown but not cached."""
+        if not budget.truncated:
+            return False
+        self.deadline_truncations += 1
+        perf_note(deadline_truncated=kind)
+        logger.info(f"{kind.capitalize()} translation cut off by its {budget.deadline_ms} ms deadline: '{text}'", "MODELS")
+        return True
 
     @exec_time_wrap
     def translate(self, text: str) -> str:
-        # Check cache first
-        if text in self._translation_cache:
-            return self._translation_cache[text]
+        # Check translation memory first
+        cached = self._memory.get(self._pair, self._model_id, text)
+        if cached is not None:
+            return cached
+
+        self.mt_ready.wait()
+        if self._mt_error is not None:
+            return text  # MT failed to load: show the original text
         
         try:
-            # Move inputs to the same device as the model
-            inputs = self._tokenizer(text, return_tensors="pt").to(self._device)
-            
-            # Use faster generation parameters
-            with torch.no_grad():  # Disable gradient computation for faster inference
-                outputs = self._mt_model.generate(
-                    **inputs,
-                    max_length=128,        # Reduced from 512
-                    num_beams=1,           # Keep greedy
-                    do_sample=False,       # Keep deterministic
-                    early_stopping=True,   # Stop early when possible
-                    pad_token_id=self._tokenizer.eos_token_id,
-                    use_cache=True,        # Enable KV cache
-                )
-            
-            result = self._tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Cache the result
-            if len(self._translation_cache) >= self._max_cache_size:
-                self._cleanup_cache()
-            
-            self._translation_cache[text] = result
-            
+            budget = self._budget()
+            with self._mt_lock:
+                result = self._mt.translate_batch([text], draft=self._draft_mt, budget=budget)[0]
+            if not self._truncated(budget, "final", text):
+                self._memory.put(self._pair, self._model_id, text, result)
             return result
         except Exception as e:
             logger.error(f"Failed to translate '{text}': {e}", "MODELS")
             return text  # Return original text if translation fails
 
-    def _cleanup_cache(self) -> None:
-        """Efficiently evict oldest entries."""
-        for _ in range(self._max_cache_size // 4):
-            if self._translation_cache:
-                self._translation_cache.popitem(last=False)
+    @exec_time_wrap
+    def translate_stream(self, text: str, on_text: Callable[[str], None]) -> str:
+        """Like translate(), but reports the translation word by word through on_text while decoding."""
+        cached = self._memory.get(self._pair, self._model_id, text)
+        if cached is not None:
+            return cached
+
+        self.mt_ready.wait()
+        if self._mt_error is not None:
+            return text
+
+        budget = self._budget()
+        try:
+            with self._mt_lock:
+                result = self._mt.translate_stream(text, on_text, draft=self._draft_mt, budget=budget)
+        except Exception as e:
+            logger.error(f"Failed to translate '{text}': {e}", "MODELS")
+            return text
+        if not self._truncated(budget, "final", text):
+            self._memory.put(self._pair, self._model_id, text, result)
+        return result
+
+    def _partial_backend(self) -> tuple[MTBackend | None, str]:
+        """(backend, cache model id) for partials: the partial slot when loaded, else the final model."""
+        if self._partial_mt is not None:
+            return self._partial_mt, self._partial_model_id
+        self.mt_ready.wait()
+        if self._partial_mt is not None:
+            return self._partial_mt, self._partial_model_id
+        return (None, self._model_id) if self._mt_error is not None else (self._mt, self._model_id)
+
+    @exec_time_wrap
+    def translate_partial(self, text: str, is_cancelled: Callable[[], bool] = None) -> str | None:
+        """
+        Translate a growing partial, reusing the previous partial's translation prefix when the source
+        extends it. Returns None if is_cancelled() became true mid-decode (the partial is stale).
+        A final's translation of the same text takes precedence over the partial model's.
+        """
+        cached = self._memory.get(self._pair, self._model_id, text)
+        if cached is not None:
+            return cached
+
+        backend, model_id = self._partial_backend()
+        if backend is None:
+            return text  # MT failed to load: show the original text
+        if model_id != self._model_id:
+            # Partial translations are never persisted, so only the in-memory cache can have them
+            cached = self._memory.get(self._pair, model_id, text, disk=False)
+            if cached is not None:
+                return cached
+
+        last_backend, state = self._partial_state
+        if last_backend is not backend or not self.settings.mt_partial_reuse:
+            state = None  # Token ids are only meaningful to the model that produced them
+        budget = self._budget(partial=True)
+        try:
+            with self._mt_lock:
+                result, state = backend.translate_extending(
+                    text, state, self.settings.mt_partial_rollback, is_cancelled=is_cancelled, budget=budget)
+            self._partial_state = (backend, state)
+        except Exception as e:
+            logger.error(f"Failed to translate partial '{text}': {e}", "MODELS")
+            self._partial_state = (None, None)
+            return text
+
+        if result is not None and not self._truncated(budget, "partial", text):
+            # Partials are short-lived: keep them in RAM only, under the partial model's namespace
+            self._memory.put(self._pair, model_id, text, result, persist=False)
+        return result
+
+    @exec_time_wrap
+    def translate_commit(self, text: str) -> str:
+        """
+        Translate a committed (stable) prefix of a partial for display next to the partial's tail.
+        Like partials, fragments are kept in RAM only: they are not sentences, and finals are always
+        translated whole, so a fragment's translation must never stand in for a final's.
+        """
+        backend, model_id = self._partial_backend()
+        if backend is None:
+            return text
+        cached = self._memory.get(self._pair, model_id, text, disk=False)
+        if cached is not None:
+            return cached
+
+        budget = self._budget(partial=True)
+        try:
+            with self._mt_lock:
+                result = backend.translate_batch([text], budget=budget)[0]
+        except Exception as e:
+            logger.error(f"Failed to translate committed prefix '{text}': {e}", "MODELS")
+            return text
+
+        if not self._truncated(budget, "commit", text):
+            self._memory.put(self._pair, model_id, text, result, persist=False)
+        return result
+
+    @exec_time_wrap
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        """
+        Translate several texts with one padded generate call; cached texts are not re-run.
+        With a draft model the texts are decoded one by one (assisted decoding is single-sequence).
+        """
+        known = {}
+        for text in texts:
+            cached = self._memory.get(self._pair, self._model_id, text)
+            if cached is not None:
+                known[text] = cached
+        pending = list(dict.fromkeys(text for text in texts if text not in known))
+        if not pending:
+            return [known[text] for text in texts]
+
+        self.mt_ready.wait()
+        if self._mt_error is not None:
+            return list(texts)
+
+        budget = self._budget()
+        try:
+            with self._mt_lock:
+                results = dict(zip(pending, self._mt.translate_batch(pending, draft=self._draft_mt, budget=budget)))
+        except Exception as e:
+            logger.error(f"Failed to translate batch of {len(pending)}: {e}", "MODELS")
+            return [known.get(text, text) for text in texts]
+
+        if not self._truncated(budget, "final", " | ".join(pending)):
+            for text, result in results.items():
+                self._memory.put(self._pair, self._model_id, text, result)
+        known.update(results)
+        return [known[text] for text in texts]
 
     def get_noise_reducer(self) -> Callable:
         """Get the noise reduction model for use in audio processing."""
@@ -101,9 +405,16 @@ class ModelBundle:
         """Get the device (cpu/cuda) for tensor operations."""
         return self._device
 
+    def flush_translations(self) -> None:
+        """Write queued translation memory entries to disk and log cache counters."""
+        self._memory.flush()
+        logger.info(f"Translation cache: {self._memory.stats()}", "MODELS")
+        if self.deadline_truncations:
+            logger.info(f"{self.deadline_truncations} translations were cut off by their deadline", "MODELS")
+
     def clear_cache(self) -> None:
         """Clear the translation cache. DEBUG TOOL"""
-        self._translation_cache.clear()
+        self._memory.clear_memory()
         logger.info("Cleared translation cache", "MODELS")
 
 
@@ -0,0 +1,583 @@
+"""MT inference engines. ModelBundle picks one per language pair (see SettingsManager.mt_engine)."""
+
+import os
+import re
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from .registry import directory_size, torch_module_size
+from .vocab_trim import load_tokenizer
+from utils.cpu_policy import default_mt_threads
+from utils.logger import logger
+from utils.utils import perf_note
+
+
+def library_versions() -> dict:
+    """torch/transformers versions recorded with on-disk artifacts, which are rebuilt when they change."""
+    import torch
+    import transformers
+    return {"torch": torch.__version__, "transformers": transformers.__version__}
+
+
+def source_fingerprint(path: str) -> dict:
+    """Identity of the source model stored with derived artifacts: file sizes and newest mtime of a local directory."""
+    if not os.path.isdir(path):
+        return {"path": path}
+    files = [entry for entry in os.scandir(path) if entry.is_file()]
+    return {"path": path, "size": sum(entry.stat().st_size for entry in files),
+            "mtime": max((entry.stat().st_mtime for entry in files), default=0)}
+
+
+def read_json(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def artifact_name(path: str) -> str:
+    """Directory name for on-disk artifacts derived from a model path or hub id."""
+    return re.sub(r"[^\w.-]+", "_", path.strip("\\/"))
+
+
+class PrefixState:
+    """Source token ids and generated target ids (with decoder start token) of the last partial."""
+    __slots__ = ("source", "output")
+
+    def __init__(self, source: list[int], output: list[int]):
+        self.source = source
+        self.output = output
+
+
+class CancelCriteria:
+    """
+    transformers StoppingCriteria that ends generate() after the current decoding step once
+    is_cancelled() returns true (e.g. a newer ASR hypothesis is waiting). Duck-typed so this
+    module does not import transformers at load time.
+    """
+    def __init__(self, is_cancelled: Callable[[], bool]):
+        self._is_cancelled = is_cancelled
+        self.triggered = False
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        if not self.triggered and self._is_cancelled():
+            self.triggered = True
+        return torch.full((input_ids.shape[0],), self.triggered, dtype=torch.bool, device=input_ids.device)
+
+
+class GenerationBudget:
+    """
+    Decode limits for one request: at most length_ratio target tokens per source token plus
+    margin (capped by max_new_tokens), and a wall-clock deadline counted from creation.
+    `truncated` is set when the deadline cut the decode short.
+    """
+    __slots__ = ("length_ratio", "margin", "max_new_tokens", "deadline", "deadline_ms", "truncated")
+
+    def __init__(self, length_ratio: float = None, margin: int = 8, max_new_tokens: int = 128, deadline_ms: float = 0):
+        self.length_ratio = length_ratio
+        self.margin = margin
+        self.max_new_tokens = max_new_tokens
+        self.deadline_ms = deadline_ms
+        self.deadline = time.perf_counter() + deadline_ms / 1000 if deadline_ms else None
+        self.truncated = False
+
+    def new_tokens(self, source_length: int) -> int:
+        if not self.length_ratio:
+            return self.max_new_tokens
+        return min(self.max_new_tokens, math.ceil(source_length * self.length_ratio) + self.margin)
+
+
+class DeadlineCriteria:
+    """StoppingCriteria like CancelCriteria, triggered once time.perf_counter() passes deadline."""
+    def __init__(self, deadline: float):
+        self._deadline = deadline
+        self.triggered = False
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        if not self.triggered and time.perf_counter() >= self._deadline:
+            self.triggered = True
+        return torch.full((input_ids.shape[0],), self.triggered, dtype=torch.bool, device=input_ids.device)
+
+
+class WordStreamer:
+    """
+    transformers streamer (put/end, called from inside generate) that reports the decoded
+    text each time a word is complete. The last word is held back because the next subword
+    token may still extend it.
+    """
+    def __init__(self, tokenizer, on_text: Callable[[str], None]):
+        self._tokenizer = tokenizer
+        self._on_text = on_text
+        self._tokens = []
+        self._prompt = True
+        self._shown = ""
+
+    def put(self, value) -> None:
+        if self._prompt:
+            self._prompt = False  # First call carries the decoder start token
+            return
+        self._tokens.extend(value.reshape(-1).tolist())
+        text = self._tokenizer.decode(self._tokens, skip_special_tokens=True)
+        cut = text.rfind(" ")
+        if cut > 0 and text[:cut] != self._shown:
+            self._shown = text[:cut]
+            self._on_text(self._shown)
+
+    def end(self) -> None:
+        pass
+
+
+class MTBackend(ABC):
+    """
+    A loaded MT model plus its tokenizer. load() runs once on a loader thread,
+    translate_batch() is called from MTWorker only (backends need not be thread-safe).
+    """
+    name = ""
+    uses_torch_threads = True  # Inference runs on torch's intra-op pool (torch.set_num_threads applies)
+    supports_draft = True  # model is a transformers torch model usable for (or with) assisted decoding
+    WARMUP_TEXT = "Hello, how are you?"
+
+    def __init__(self, path: str, settings):
+        self.path = path
+        self.settings = settings
+        self.device = "cpu"
+        self.tokenizer = None
+        self.model = None
+
+    @abstractmethod
+    def load(self) -> None:
+        ...
+
+    @abstractmethod
+    def translate_batch(self, texts: list[str], max_length: int = 128, draft: "MTBackend" = None,
+                        budget: GenerationBudget = None) -> list[str]:
+        ...
+
+    def warmup(self) -> None:
+        """Pay first-call costs (allocator, kernel selection, lazy init) before the first real request."""
+        start = time.perf_counter()
+        self.translate_batch([self.WARMUP_TEXT], max_length=16)
+        logger.info(f"MT warm-up ({self.name}) took {time.perf_counter() - start:.2f}s", "MODELS")
+
+    def size_bytes(self) -> int:
+        """Resident size estimate used by the model registry."""
+        return 0
+
+    def accepts_draft(self, draft: "MTBackend") -> bool:
+        """Whether draft can propose tokens for this model: both torch, same device, identical vocabulary."""
+        return (self.supports_draft and draft.supports_draft and draft.device == self.device
+                and getattr(draft.tokenizer, "keep_ids", None) == getattr(self.tokenizer, "keep_ids", None)
+                and draft.tokenizer.get_vocab() == self.tokenizer.get_vocab())
+
+    def _encode(self, texts: list[str]) -> dict:
+        """Padded model inputs for texts, on the backend's device."""
+        return self.tokenizer(texts, return_tensors="pt", padding=True).to(self.device)
+
+    def _source_inputs(self, source: list[int]) -> dict:
+        """Model inputs for one already tokenized source."""
+        import torch
+        return {"input_ids": torch.tensor([source], device=self.device)}
+
+    def _generate(self, inputs: dict, max_length: int, draft: "MTBackend" = None,
+                  budget: GenerationBudget = None, **kwargs):
+        """
+        Greedy generate. With a draft model this is assisted (speculative) decoding: the draft proposes
+        a few tokens, the main model scores them all in one forward pass and keeps the longest prefix
+        matching its own argmax plus its next token, so the output is the same as plain greedy.
+        Single sequences only. Acceptance is attached to the caller's PERF log line.
+        A budget caps the output length by the source length and stops decoding at its deadline.
+        """
+        import torch
+        prefix_length = inputs["decoder_input_ids"].shape[-1] if "decoder_input_ids" in inputs else 1
+        deadline = None
+        if budget is not None:
+            mask = inputs.get("attention_mask")
+            source_length = int(mask.sum(-1).max()) if mask is not None else inputs["input_ids"].shape[-1]
+            max_length = min(max_length, 1 + budget.new_tokens(source_length))
+            if budget.deadline is not None:
+                from transformers import StoppingCriteriaList
+                deadline = DeadlineCriteria(budget.deadline)
+                kwargs["stopping_criteria"] = StoppingCriteriaList([*(kwargs.get("stopping_criteria") or []), deadline])
+        params = dict(max_length=max(max_length, prefix_length + 1), num_beams=1, do_sample=False,
+                      pad_token_id=self.tokenizer.eos_token_id, use_cache=True, **kwargs)
+
+        if draft is None:
+            with torch.no_grad():
+                outputs = self.model.generate(**inputs, **params)
+        else:
+            outputs = self._assisted_generate(inputs, draft, prefix_length, params)
+
+        # Rows that ended on </s> (finished rows are padded with it) were complete despite the deadline
+        if deadline is not None and deadline.triggered and not bool((outputs[:, -1] == self.tokenizer.eos_token_id).all()):
+            budget.truncated = True
+        return outputs
+
+    def _assisted_generate(self, inputs: dict, draft: "MTBackend", prefix_length: int, params: dict):
+        import torch
+        # Decoder forward passes: one per verification step (main) and one per proposed token (draft)
+        passes = {"main": 0, "draft": 0}
+        def counter(name):
+            return lambda *_: passes.__setitem__(name, passes[name] + 1)
+        hooks = [self.model.register_forward_hook(counter("main")),
+                 draft.model.register_forward_hook(counter("draft"))]
+        try:
+            with torch.no_grad():
+                outputs = self.model.generate(**inputs, assistant_model=draft.model, **params)
+        finally:
+            for hook in hooks:
+                hook.remove()
+
+        generated = outputs.shape[-1] - prefix_length
+        if passes["main"]:
+            # Every main pass yields one token of its own; the rest were draft tokens it accepted
+            accepted = max(0, generated - passes["main"])
+            perf_note(draft_accepted=f"{accepted}/{passes['draft']}",
+                      accept_rate=f"{accepted / passes['draft']:.2f}" if passes["draft"] else "n/a",
+                      decode_speedup=f"{generated / passes['main']:.2f}x")
+        return outputs
+
+    def translate_extending(self, text: str, state: PrefixState | None, rollback: int, max_length: int = 128,
+                            is_cancelled: Callable[[], bool] = None,
+                            budget: GenerationBudget = None) -> tuple[str | None, PrefixState]:
+        """
+        Translate a partial that may extend the previous one (state). When the source only grew,
+        the previous translation minus its last `rollback` tokens is forced as the decoder prefix:
+        it is processed in one parallel forward pass instead of token-by-token decoding, and only
+        the tail is generated. Otherwise this is a normal greedy pass.
+        Returns None as the text when is_cancelled() stopped the decode; the returned state still
+        holds the tokens decoded so far, which remain a valid prefix for the next partial.
+        """
+        import torch
+        from transformers import StoppingCriteriaList
+        source = self.tokenizer(text).input_ids
+        prefix = [self.model.config.decoder_start_token_id]
+        # Marian appends </s>, so compare the previous source without it
+        if state is not None and len(source) > len(state.source) and source[:len(state.source) - 1] == state.source[:-1]:
+            special = {self.tokenizer.eos_token_id, self.tokenizer.pad_token_id}
+            body = [token for token in state.output[1:] if token not in special]
+            prefix += body[:max(0, len(body) - rollback)]
+
+        cancel = CancelCriteria(is_cancelled) if is_cancelled else None
+        outputs = self._generate(
+            {**self._source_inputs(source), "decoder_input_ids": torch.tensor([prefix], device=self.device)},
+            max_length,
+            budget=budget,
+            stopping_criteria=StoppingCriteriaList([cancel]) if cancel else None,
+        )
+        output = outputs[0].tolist()
+        if cancel is not None and cancel.triggered:
+            return None, PrefixState(source, output)
+        return self.tokenizer.decode(output, skip_special_tokens=True), PrefixState(source, output)
+
+    def translate_stream(self, text: str, on_text: Callable[[str], None], max_length: int = 128,
+                         draft: "MTBackend" = None, budget: GenerationBudget = None) -> str:
+        """Greedy translation of one text, calling on_text(translation so far) as words complete."""
+        inputs = self._encode([text])
+        outputs = self._generate(inputs, max_length, draft=draft, budget=budget, streamer=WordStreamer(self.tokenizer, on_text))
+        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+    def _load_tokenizer_with(self, load_model):
+        """Run load_model() while the tokenizer loads concurrently; returns the model."""
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="tokenizer-load") as pool:
+            tokenizer_future = pool.submit(load_tokenizer, self.path)
+            model = load_model()
+            self.tokenizer = tokenizer_future.result()
+        return model
+
+
+class TorchBackend(MTBackend):
+    """transformers AutoModelForSeq2SeqLM, on CUDA in fp16 when available."""
+    name = "torch"
+    attn_implementation = None  # transformers' default attention
+
+    def load(self) -> None:
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+
+        self.device = self._pick_device()
+        dtype = torch.float16 if self.device == "cuda" else torch.float32
+        kwargs = {"attn_implementation": self.attn_implementation} if self.attn_implementation else {}
+
+        self.model = self._load_tokenizer_with(
+            lambda: AutoModelForSeq2SeqLM.from_pretrained(self.path, dtype=dtype, **kwargs).to(self.device))
+        # Enable evaluation mode for faster inference
+        self.model.eval()
+
+    def _pick_device(self) -> str:
+        import torch
+        # Try to load on GPU for much faster inference
+        try:
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        except Exception as e:
+            logger.warning(f"Failed to query CUDA: {e}, using CPU", "MODELS")
+            return "cpu"
+
+    def translate_batch(self, texts: list[str], max_length: int = 128, draft: MTBackend = None,
+                        budget: GenerationBudget = None) -> list[str]:
+        if draft is not None and len(texts) > 1:
+            # Assisted decoding works on one sequence at a time
+            return [self.translate_batch([text], max_length, draft, budget)[0] for text in texts]
+        outputs = self._generate(self._encode(texts), max_length, draft=draft, budget=budget)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def size_bytes(self) -> int:
+        return torch_module_size(self.model)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """
+    TorchBackend on CPU with dynamic INT8 quantization of every nn.Linear (weights stored
+    as int8, activations quantized on the fly). Quantizing means loading the float model
+    first, so the result is pickled to settings.mt_quantized_dir once and later startups
+    load that artifact directly. The artifact is rebuilt when the source model or
+    torch/transformers change.
+    """
+    name = "int8"
+    MODEL_FILE = "model-int8.pt"
+    META_FILE = "quantization.json"
+
+    def __init__(self, path: str, settings):
+        super().__init__(path, settings)
+        self.artifact_dir = os.path.join(settings.mt_quantized_dir, artifact_name(path))
+
+    def _artifact_valid(self) -> bool:
+        meta = read_json(os.path.join(self.artifact_dir, self.META_FILE))
+        if meta is None or not os.path.exists(os.path.join(self.artifact_dir, self.MODEL_FILE)):
+            return False
+        if meta.get("model") != source_fingerprint(self.path) or meta.get("versions") != library_versions():
+            logger.info(f"INT8 artifact in {self.artifact_dir} is stale (source model or versions changed)", "MODELS")
+            return False
+        return True
+
+    def load(self) -> None:
+        import torch
+
+        model_file = os.path.join(self.artifact_dir, self.MODEL_FILE)
+        if self._artifact_valid():
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="tokenizer-load") as pool:
+                tokenizer_future = pool.submit(load_tokenizer, self.artifact_dir)
+                self.model = torch.load(model_file, weights_only=False)
+                self.tokenizer = tokenizer_future.result()
+            self.model.eval()
+            return
+
+        start = time.perf_counter()
+        super().load()
+        float_size = torch_module_size(self.model)
+        self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model.eval()
+
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        torch.save(self.model, model_file)
+        self.tokenizer.save_pretrained(self.artifact_dir)
+        with open(os.path.join(self.artifact_dir, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"source": self.path, "model": source_fingerprint(self.path), "versions": library_versions(), "float_bytes": float_size,
+                       "int8_bytes": os.path.getsize(model_file)}, f, indent=2)
+        logger.info(f"Quantized {self.path} to INT8 in {time.perf_counter() - start:.1f}s: "
+                    f"{float_size / 1024 ** 2:.0f} MB -> {os.path.getsize(model_file) / 1024 ** 2:.0f} MB "
+                    f"({self.artifact_dir})", "MODELS")
+
+    def _pick_device(self) -> str:
+        return "cpu"  # Dynamic quantized kernels are CPU-only
+
+    def size_bytes(self) -> int:
+        # Packed int8 weights are not parameters, so measure the artifact on disk
+        return directory_size(self.artifact_dir)
+
+
+class CompiledTorchBackend(TorchBackend):
+    """
+    TorchBackend with scaled-dot-product attention and torch.compile'd encoder and decoder.
+    Sources are padded to the smallest of settings.mt_compile_buckets, so the encoder and the
+    cross-attention only see a few static shapes, and every bucket is compiled while loading.
+    Compiled kernels are cached under settings.mt_compile_cache_dir, so only the first start
+    after a model or torch/transformers change pays the full compile cost. If compiling (or a
+    compiled call) fails, the backend falls back to eager execution.
+    """
+    name = "compiled"
+    attn_implementation = "sdpa"
+    CACHE_FILE = "compile-cache.bin"
+    META_FILE = "compile.json"
+
+    def __init__(self, path: str, settings):
+        super().__init__(path, settings)
+        self.buckets = sorted(settings.mt_compile_buckets)
+        self.artifact_dir = os.path.join(settings.mt_compile_cache_dir, artifact_name(path))
+        self.compiled = False
+
+    def load(self) -> None:
+        try:
+            super().load()
+        except (ValueError, ImportError) as e:
+            logger.warning(f"SDPA attention unavailable for {self.path}: {e}, using the default attention", "MODELS")
+            self.attn_implementation = None
+            super().load()
+        try:
+            self._compile()
+        except Exception as e:
+            logger.warning(f"torch.compile failed for {self.path}: {e}, running eager", "MODELS")
+            self._use_eager()
+
+    def _meta(self) -> dict:
+        return {"model": source_fingerprint(self.path), "versions": library_versions(), "buckets": self.buckets, "device": self.device,
+                "attention": self.attn_implementation}
+
+    def _compile(self) -> None:
+        import torch
+        meta = self._meta()
+        meta_file = os.path.join(self.artifact_dir, self.META_FILE)
+        cache_file = os.path.join(self.artifact_dir, self.CACHE_FILE)
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        # Inductor's FX graph cache; shared by all models, entries are keyed by graph and inputs
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR",
+                              os.path.abspath(os.path.join(self.settings.mt_compile_cache_dir, "inductor")))
+        cached = read_json(meta_file) == meta
+        if cached and hasattr(torch.compiler, "load_cache_artifacts") and os.path.exists(cache_file):
+            with open(cache_file, "rb") as f:
+                torch.compiler.load_cache_artifacts(f.read())
+
+        encoder, decoder = self.model.get_encoder(), self.model.get_decoder()
+        encoder.forward = torch.compile(encoder.forward, dynamic=False)
+        # The decoder's self-attention cache grows every step, so only its batch and bucket shapes are static
+        decoder.forward = torch.compile(decoder.forward, dynamic=True)
+        self.compiled = True
+
+        start = time.perf_counter()
+        for bucket in self.buckets:
+            bucket_start = time.perf_counter()
+            inputs = self.tokenizer([self.WARMUP_TEXT], return_tensors="pt").to(self.device)
+            self._generate(self._pad_to_bucket(inputs, bucket), max_length=8)
+            logger.debug(f"Compiled bucket {bucket} in {time.perf_counter() - bucket_start:.2f}s", "MODELS")
+        logger.info(f"Compiled {self.path} for buckets {self.buckets} in {time.perf_counter() - start:.1f}s"
+                    f"{' (cached)' if cached else ''}", "MODELS")
+
+        if not cached:
+            artifacts = torch.compiler.save_cache_artifacts() if hasattr(torch.compiler, "save_cache_artifacts") else None
+            if artifacts:
+                with open(cache_file, "wb") as f:
+                    f.write(artifacts[0])
+            with open(meta_file, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+
+    def _use_eager(self) -> None:
+        for module in (self.model.get_encoder(), self.model.get_decoder()):
+            module.__dict__.pop("forward", None)  # Drop the compiled wrapper, back to the class method
+        self.compiled = False
+
+    def _pad_to_bucket(self, inputs: dict, bucket: int = None) -> dict:
+        import torch
+        import torch.nn.functional as F
+        input_ids = inputs["input_ids"]
+        attention_mask = inputs.get("attention_mask")
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        length = input_ids.shape[-1]
+        if bucket is None:
+            # Longer than every bucket: exact shape (dynamo recompiles up to its cache limit, then runs eager)
+            bucket = next((b for b in self.buckets if b >= length), length)
+        return {"input_ids": F.pad(input_ids, (0, bucket - length), value=self.tokenizer.pad_token_id),
+                "attention_mask": F.pad(attention_mask, (0, bucket - length), value=0)}
+
+    def _encode(self, texts: list[str]) -> dict:
+        inputs = super()._encode(texts)
+        return self._pad_to_bucket(inputs) if self.compiled else inputs
+
+    def _source_inputs(self, source: list[int]) -> dict:
+        inputs = super()._source_inputs(source)
+        return self._pad_to_bucket(inputs) if self.compiled else inputs
+
+    def _generate(self, inputs: dict, max_length: int, draft: MTBackend = None, **kwargs):
+        if not self.compiled:
+            return super()._generate(inputs, max_length, draft=draft, **kwargs)
+        try:
+            return super()._generate(inputs, max_length, draft=draft, **kwargs)
+        except Exception as e:
+            logger.warning(f"Compiled MT call failed: {e}, switching {self.path} to eager", "MODELS")
+            self._use_eager()
+            return super()._generate(inputs, max_length, draft=draft, **kwargs)
+
+
+class OnnxBackend(MTBackend):
+    """
+    Marian encoder + decoder-with-past exported to ONNX and run on ONNX Runtime's CPU
+    execution provider. The export (via optimum) happens once and is kept in
+    settings.onnx_cache_dir; later loads read the exported graphs directly. The export is
+    redone when the source model or the library versions no longer match export.json.
+    """
+    name = "onnx"
+    uses_torch_threads = False
+    supports_draft = False
+    ENCODER_FILE = "encoder_model.onnx"
+    META_FILE = "export.json"
+
+    def __init__(self, path: str, settings):
+        super().__init__(path, settings)
+        self.export_dir = os.path.join(settings.onnx_cache_dir, artifact_name(path))
+
+    def load(self) -> None:
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise RuntimeError(f"ONNX engine needs onnxruntime and optimum[onnxruntime] installed: {e}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.settings.mt_threads or default_mt_threads()
+        options.inter_op_num_threads = max(1, self.settings.mt_interop_threads)
+        meta = self._meta()
+        meta_file = os.path.join(self.export_dir, self.META_FILE)
+        has_export = os.path.exists(os.path.join(self.export_dir, self.ENCODER_FILE))
+        exported = has_export and read_json(meta_file) == meta
+        if has_export and not exported:
+            logger.info(f"ONNX export in {self.export_dir} is stale (source model or versions changed)", "MODELS")
+
+        def load_model():
+            if exported:
+                return ORTModelForSeq2SeqLM.from_pretrained(
+                    self.export_dir, use_cache=True, provider="CPUExecutionProvider", session_options=options)
+            logger.info(f"Exporting {self.path} to ONNX in {self.export_dir}", "MODELS")
+            model = ORTModelForSeq2SeqLM.from_pretrained(
+                self.path, export=True, use_cache=True, provider="CPUExecutionProvider", session_options=options)
+            model.save_pretrained(self.export_dir)
+            return model
+
+        self.model = self._load_tokenizer_with(load_model)
+        if not exported:
+            self.tokenizer.save_pretrained(self.export_dir)
+            with open(meta_file, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+
+    def _meta(self) -> dict:
+        import onnxruntime
+        import optimum.version
+        return {"model": source_fingerprint(self.path),
+                "versions": {**library_versions(), "onnxruntime": onnxruntime.__version__,
+                             "optimum": optimum.version.__version__}}
+
+    def translate_batch(self, texts: list[str], max_length: int = 128, draft: MTBackend = None,
+                        budget: GenerationBudget = None) -> list[str]:
+        # optimum drives the ORT sessions through the regular generate loop (greedy, KV cache via decoder-with-past)
+        outputs = self._generate(self._encode(texts), max_length, budget=budget)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def size_bytes(self) -> int:
+        return directory_size(self.export_dir)
+
+
+MT_BACKENDS = {backend.name: backend for backend in (TorchBackend, QuantizedTorchBackend, CompiledTorchBackend,
+                                                      OnnxBackend)}
+
+
+def create_mt_backend(engine: str, path: str, settings) -> MTBackend:
+    try:
+        return MT_BACKENDS[engine](path, settings)
+    except KeyError:
+        raise ValueError(f"Unknown MT engine '{engine}', expected one of {sorted(MT_BACKENDS)}")
@@ -0,0 +1,136 @@
+"""Process-wide registry of loaded models, shared across ModelBundle instances."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from utils.logger import logger
+
+
+class _Entry:
+    __slots__ = ("value", "size", "refs", "last_used")
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.refs = 0
+        self.last_used = time.monotonic()
+
+
+class ModelRegistry:
+    """
+    Keeps loaded models resident between restarts and language swaps.
+    Entries are keyed by e.g. (kind, path, dtype, device) and reference counted;
+    unreferenced entries stay cached and are evicted least-recently-used first
+    once the total estimated size exceeds the RAM budget.
+    """
+    def __init__(self, budget_bytes: int = 4 * 1024 ** 3):
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._loading: dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any], size_fn: Callable[[Any], int] = None) -> Any:
+        """Return the model for key, loading it with loader() if it is not resident. Pair with release()."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    entry.last_used = time.monotonic()
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                loading = self._loading.get(key)
+                if loading is None:
+                    # This thread loads; others asking for the same key wait for it
+                    loading = self._loading[key] = threading.Event()
+                    break
+            loading.wait()
+
+        try:
+            start = time.perf_counter()
+            value = loader()
+            size = size_fn(value) if size_fn else 0
+            with self._lock:
+                entry = _Entry(value, size)
+                entry.refs = 1
+                self._entries[key] = entry
+                self.misses += 1
+            logger.info(f"Loaded {key} in {time.perf_counter() - start:.2f}s (~{size / 1024 ** 2:.0f} MB)", "REGISTRY")
+            self._evict()
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def release(self, key: Hashable) -> None:
+        """Drop one reference; the model stays cached until evicted."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs = max(0, entry.refs - 1)
+            entry.last_used = time.monotonic()
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            total = sum(entry.size for entry in self._entries.values())
+            for key in list(self._entries.keys()):
+                if total <= self.budget_bytes:
+                    break
+                entry = self._entries[key]
+                if entry.refs > 0:
+                    continue
+                del self._entries[key]
+                total -= entry.size
+                self.evictions += 1
+                logger.info(f"Evicted {key} from model registry (~{entry.size / 1024 ** 2:.0f} MB)", "REGISTRY")
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "resident_mb": round(sum(e.size for e in self._entries.values()) / 1024 ** 2, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        """Forget every unreferenced model."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.refs == 0]:
+                del self._entries[key]
+
+
+def directory_size(path: str) -> int:
+    """Size on disk of a model directory, used as the resident size estimate for Vosk models."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def torch_module_size(module) -> int:
+    """Bytes held by a torch module's parameters and buffers."""
+    return sum(t.numel() * t.element_size() for t in list(module.parameters()) + list(module.buffers()))
+
+
+# Shared by every ModelBundle in the process
+model_registry = ModelRegistry()
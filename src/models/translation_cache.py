@@ -0,0 +1,95 @@
+"""Thread-safe LRU translation cache with key normalization, a byte budget and per-namespace counters."""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable
+
+
+class TranslationCache:
+    """
+    Maps (namespace, normalized source) -> translation. Namespaces keep language pairs and
+    models apart. Eviction is least-recently-used, O(1) per entry (OrderedDict), and bounded
+    by the estimated bytes held rather than an entry count, so long sentences cost what they weigh.
+    All methods take one lock and may be called from several threads.
+    """
+    # OrderedDict node, key tuple and bookkeeping per entry, on top of the two strings
+    ENTRY_OVERHEAD = 160
+
+    def __init__(self, max_bytes: int = 32 * 1024 ** 2, filler_words: Iterable[str] = ()):
+        self.max_bytes = max_bytes
+        self.filler_words = frozenset(word.casefold() for word in filler_words)
+        self._entries: "OrderedDict[tuple, tuple[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._namespace_stats: dict[Hashable, list[int]] = {}
+
+    def normalize(self, text: str) -> str:
+        """Collapse whitespace and case and drop leading/trailing filler words ("um", "uh", ...)."""
+        words = text.casefold().split()
+        start, end = 0, len(words)
+        while start < end and words[start] in self.filler_words:
+            start += 1
+        while end > start and words[end - 1] in self.filler_words:
+            end -= 1
+        return " ".join(words[start:end])
+
+    def _count(self, namespace: Hashable, hit: bool) -> None:
+        counters = self._namespace_stats.get(namespace)
+        if counters is None:
+            counters = self._namespace_stats[namespace] = [0, 0]
+        counters[0 if hit else 1] += 1
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def get(self, namespace: Hashable, text: str) -> str | None:
+        key = (namespace, self.normalize(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            self._count(namespace, entry is not None)
+            return entry[0] if entry is not None else None
+
+    def put(self, namespace: Hashable, text: str, value: str) -> None:
+        key = (namespace, self.normalize(text))
+        size = sys.getsizeof(key[1]) + sys.getsizeof(value) + self.ENTRY_OVERHEAD
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self, namespace: Hashable = None) -> None:
+        """Drop every entry, or only those of one namespace."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [key for key in self._entries if key[0] == namespace]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "kb": round(self._bytes / 1024, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "namespaces": {str(ns): {"hits": h, "misses": m} for ns, (h, m) in self._namespace_stats.items()},
+            }
@@ -0,0 +1,154 @@
+"""Persistent translation memory: SQLite (WAL) on disk behind an in-memory LRU."""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from .translation_cache import TranslationCache
+from utils.logger import logger
+
+
+class TranslationMemory:
+    """
+    Translations keyed by (language pair, model identity, normalized source).
+    Lookups hit the in-memory TranslationCache first and fall back to an indexed SQLite read on a miss.
+    Writes go to the LRU immediately and are persisted by a background thread in batches,
+    so the MT thread never waits on a disk write. path=None keeps the memory in RAM only.
+    One instance per path is shared across ModelBundles so restarts keep the LRU warm.
+    """
+    _shared: dict = {}
+    _shared_lock = threading.Lock()
+
+    FLUSH_INTERVAL = 0.5
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS translations (
+            pair TEXT NOT NULL,
+            model TEXT NOT NULL,
+            source TEXT NOT NULL,
+            target TEXT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            updated REAL NOT NULL,
+            PRIMARY KEY (pair, model, source)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, path: str = None, cache: TranslationCache = None):
+        self.path = path
+        self.cache = cache or TranslationCache()
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        # Separate connections: with WAL, lookups never wait for the writer's transaction
+        self._db = None
+        self._read_lock = threading.Lock()
+        self._write_db = None
+        self._write_lock = threading.Lock()
+
+        self.disk_hits = 0
+
+        if path:
+            try:
+                self._write_db = self._connect()
+                self._write_db.execute(self.SCHEMA)
+                self._db = self._connect()
+                threading.Thread(target=self._write_loop, daemon=True).start()
+            except sqlite3.Error as e:
+                logger.warning(f"Translation memory unavailable ({path}): {e}, using RAM only", "TM")
+                self._db = self._write_db = None
+
+    @classmethod
+    def shared(cls, path: str = None, max_bytes: int = 32 * 1024 ** 2, filler_words=()) -> "TranslationMemory":
+        with cls._shared_lock:
+            memory = cls._shared.get(path)
+            if memory is None:
+                memory = cls._shared[path] = cls(path, TranslationCache(max_bytes, filler_words))
+            memory.cache.max_bytes = max_bytes
+            return memory
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # WAL + NORMAL: durable across app crashes, fsync only at checkpoints
+        return db
+
+    def get(self, pair: str, model: str, text: str, disk: bool = True) -> str | None:
+        """Cached translation; disk=False skips the SQLite fallback (for namespaces that are never persisted)."""
+        target = self.cache.get((pair, model), text)
+        if target is not None or not disk:
+            return target
+        key = (pair, model, self.cache.normalize(text))
+        row = None
+        if self._db is not None:
+            try:
+                with self._read_lock:
+                    row = self._db.execute(
+                        "SELECT target FROM translations WHERE pair = ? AND model = ? AND source = ?", key).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Translation memory read failed: {e}", "TM")
+        if row is None:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self.cache.put((pair, model), text, row[0])
+        self._pending.append(("hit", key, None))
+        return row[0]
+
+    def put(self, pair: str, model: str, text: str, target: str, persist: bool = True) -> None:
+        """Store a translation; persist=False keeps it in memory only (e.g. short-lived partials)."""
+        self.cache.put((pair, model), text, target)
+        if persist and self._db is not None:
+            self._pending.append(("put", (pair, model, self.cache.normalize(text)), target))
+            self._wakeup.set()
+
+    def _write_pending(self) -> None:
+        puts, hits = [], []
+        while self._pending:
+            kind, key, target = self._pending.popleft()
+            if kind == "put":
+                puts.append((*key, target, time.time()))
+            else:
+                hits.append(key)
+        if not puts and not hits:
+            return
+        db = self._write_db
+        db.execute("BEGIN")
+        try:
+            db.executemany(
+                "INSERT INTO translations (pair, model, source, target, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (pair, model, source) DO UPDATE SET target = excluded.target, "
+                "updated = excluded.updated", puts)
+            db.executemany(
+                "UPDATE translations SET hits = hits + 1 WHERE pair = ? AND model = ? AND source = ?", hits)
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _write_loop(self) -> None:
+        while True:
+            self._wakeup.wait()
+            # Give a burst of finals a moment to accumulate into one transaction
+            time.sleep(self.FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write queued entries to disk now (called by the writer thread and on shutdown, never the MT thread)."""
+        if self._write_db is None:
+            return
+        with self._write_lock:
+            try:
+                self._write_pending()
+            except sqlite3.Error as e:
+                logger.error(f"Translation memory write failed: {e}", "TM")
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory cache; the on-disk memory is kept."""
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        with self._lock:
+            stats["disk_hits"] = self.disk_hits
+        return stats
@@ -0,0 +1,242 @@
+"""Target-vocabulary trimming for Marian (opus-mt) models.
+
+opus-mt models share one large vocabulary between source and target, so every decode step
+projects onto (and softmaxes over) tens of thousands of tokens the target side never emits.
+prepare_trimmed_model() keeps only the tokens a target-side corpus produces, shrinking the
+decoder embeddings, lm_head and final_logits_bias, and saves a regular HF model directory
+plus vocab_trim.json with the kept ids. Pointing mt_model_paths at that directory is enough:
+the backends wrap the tokenizer in TrimmedTokenizer, which maps ids between the original and
+the trimmed vocabularies. Usage (from src/):
+
+    python -m models.vocab_trim --model Helsinki-NLP/opus-mt-en-ru --target-corpus ru.txt --out trimmed/en-ru
+"""
+
+import os
+import json
+import argparse
+from typing import Iterable
+
+from utils.logger import logger
+
+
+TRIM_FILE = "vocab_trim.json"
+
+
+def read_keep_ids(path: str) -> tuple[list[int], list[int]] | None:
+    """(source_keep, target_keep) of a trimmed model directory, None for regular models and hub ids."""
+    trim_file = os.path.join(path, TRIM_FILE)
+    if not os.path.isfile(trim_file):
+        return None
+    with open(trim_file, encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta["source_ids"], meta["target_ids"]
+
+
+def load_tokenizer(path: str):
+    """AutoTokenizer for path, wrapped in TrimmedTokenizer when the model's vocabulary was trimmed."""
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    keep = read_keep_ids(path)
+    return TrimmedTokenizer(tokenizer, *keep) if keep else tokenizer
+
+
+class TrimmedTokenizer:
+    """
+    Original tokenizer in front of a trimmed model. Encoded source ids are mapped into the
+    encoder's vocabulary (unseen tokens become <unk>), generated ids are mapped back before
+    decoding, and the special token ids are those of the trimmed model. Everything else is
+    delegated to the wrapped tokenizer.
+    """
+    def __init__(self, tokenizer, source_keep: list[int], target_keep: list[int]):
+        self._tokenizer = tokenizer
+        self.keep_ids = (list(source_keep), list(target_keep))
+        self._source_index = {old: new for new, old in enumerate(source_keep)}
+        self._target_index = {old: new for new, old in enumerate(target_keep)}
+        self._target_keep = list(target_keep)
+        self._source_unk = self._source_index.get(tokenizer.unk_token_id, 0)
+        self._source_table = None
+
+    def __getattr__(self, name):
+        return getattr(self._tokenizer, name)
+
+    @property
+    def eos_token_id(self) -> int:
+        return self._target_index[self._tokenizer.eos_token_id]
+
+    @property
+    def pad_token_id(self) -> int:
+        return self._target_index[self._tokenizer.pad_token_id]
+
+    @property
+    def unk_token_id(self) -> int:
+        return self._target_index[self._tokenizer.unk_token_id]
+
+    def _map_source(self, ids):
+        if hasattr(ids, "shape"):
+            import torch
+            if self._source_table is None:
+                table = torch.full((len(self._tokenizer),), self._source_unk, dtype=torch.long)
+                table[list(self._source_index)] = torch.tensor(list(self._source_index.values()), dtype=torch.long)
+                self._source_table = table
+            return self._source_table.to(ids.device)[ids]
+        if ids and isinstance(ids[0], list):
+            return [self._map_source(row) for row in ids]
+        return [self._source_index.get(token, self._source_unk) for token in ids]
+
+    def _map_target(self, ids) -> list[int]:
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        return [self._target_keep[token] for token in ids]
+
+    def __call__(self, *args, **kwargs):
+        encoding = self._tokenizer(*args, **kwargs)
+        encoding["input_ids"] = self._map_source(encoding["input_ids"])
+        return encoding
+
+    def decode(self, ids, **kwargs) -> str:
+        return self._tokenizer.decode(self._map_target(ids), **kwargs)
+
+    def batch_decode(self, sequences, **kwargs) -> list[str]:
+        return [self.decode(ids, **kwargs) for ids in sequences]
+
+    def get_vocab(self) -> dict[str, int]:
+        """Target-side vocabulary in trimmed ids."""
+        return {token: self._target_index[old] for token, old in self._tokenizer.get_vocab().items()
+                if old in self._target_index}
+
+    def save_pretrained(self, path: str, **kwargs):
+        files = self._tokenizer.save_pretrained(path, **kwargs)
+        write_keep_ids(path, *self.keep_ids)
+        return files
+
+
+def write_keep_ids(path: str, source_keep: list[int], target_keep: list[int], **meta) -> None:
+    with open(os.path.join(path, TRIM_FILE), "w", encoding="utf-8") as f:
+        json.dump({**meta, "source_ids": source_keep, "target_ids": target_keep}, f)
+
+
+def corpus_token_ids(tokenizer, lines: Iterable[str], target: bool, batch_size: int = 256) -> set[int]:
+    """Every token id the tokenizer produces for the corpus, on the target or the source side."""
+    seen = set()
+    batch = []
+    for line in lines:
+        if line.strip():
+            batch.append(line.strip())
+        if len(batch) == batch_size:
+            seen.update(_encode(tokenizer, batch, target))
+            batch = []
+    if batch:
+        seen.update(_encode(tokenizer, batch, target))
+    return seen
+
+
+def _encode(tokenizer, batch: list[str], target: bool) -> set[int]:
+    encoded = tokenizer(text_target=batch) if target else tokenizer(batch)
+    return {token for ids in encoded["input_ids"] for token in ids}
+
+
+def trim_model(model, source_keep: list[int], target_keep: list[int]):
+    """
+    Marian model whose encoder vocabulary is source_keep and decoder/output vocabulary is target_keep
+    (new id = position in the list). Both lists must start with the same special tokens so pad/eos/unk
+    have one id for encoder and decoder. Embeddings are no longer shared between the two sides.
+    """
+    import copy
+    import torch
+
+    remap = {old: new for new, old in enumerate(target_keep)}
+    config = copy.deepcopy(model.config)
+    generation_config = copy.deepcopy(model.generation_config)
+    for cfg in (config, generation_config):
+        for attr in ("pad_token_id", "eos_token_id", "decoder_start_token_id", "forced_eos_token_id"):
+            if getattr(cfg, attr, None) is not None:
+                setattr(cfg, attr, remap[getattr(cfg, attr)])
+        if getattr(cfg, "bad_words_ids", None):
+            cfg.bad_words_ids = [[remap[token] for token in words] for words in cfg.bad_words_ids
+                                 if all(token in remap for token in words)] or None
+    config.vocab_size = len(source_keep)
+    config.decoder_vocab_size = len(target_keep)
+    config.share_encoder_decoder_embeddings = False
+
+    source_index = torch.tensor(source_keep, dtype=torch.long)
+    target_index = torch.tensor(target_keep, dtype=torch.long)
+    rows = {
+        "model.encoder.embed_tokens.weight": source_index,
+        "model.decoder.embed_tokens.weight": target_index,
+        "lm_head.weight": target_index,
+    }
+    original = model.state_dict()
+    shared = original.get("model.shared.weight")
+    trimmed = type(model)(config)
+    state = {}
+    for name in trimmed.state_dict():
+        # Tied weights may only be listed under the shared embedding's name
+        tensor = original.get(name, shared if name in rows else None)
+        if name in rows:
+            tensor = tensor[rows[name]]
+        elif name == "final_logits_bias":
+            tensor = tensor[:, target_index]
+        state[name] = tensor.clone()
+    trimmed.load_state_dict(state)
+    trimmed.generation_config = generation_config
+    return trimmed.eval()
+
+
+def prepare_trimmed_model(model_path: str, target_corpus: str, out_dir: str, source_corpus: str = None) -> dict:
+    """
+    Trim model_path's output vocabulary to the tokens of target_corpus (one sentence per line) and
+    save the result to out_dir. With source_corpus the encoder vocabulary is trimmed as well, which
+    also removes the encoder's copy of the large embedding matrix; otherwise it keeps every token.
+    Returns vocabulary sizes and parameter counts before and after.
+    """
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+    if model.config.model_type != "marian":
+        raise ValueError(f"Vocabulary trimming supports Marian models, {model_path} is {model.config.model_type}")
+
+    config = model.config
+    specials = list(dict.fromkeys(token for token in (
+        config.pad_token_id, config.eos_token_id, config.decoder_start_token_id, tokenizer.unk_token_id)
+        if token is not None))
+
+    with open(target_corpus, encoding="utf-8") as f:
+        target_ids = corpus_token_ids(tokenizer, f, target=True)
+    if source_corpus:
+        with open(source_corpus, encoding="utf-8") as f:
+            source_ids = corpus_token_ids(tokenizer, f, target=False)
+    else:
+        source_ids = set(range(config.vocab_size))
+    target_keep = specials + sorted(target_ids - set(specials))
+    source_keep = specials + sorted(source_ids - set(specials))
+
+    trimmed = trim_model(model, source_keep, target_keep)
+    os.makedirs(out_dir, exist_ok=True)
+    trimmed.save_pretrained(out_dir)
+    tokenizer.save_pretrained(out_dir)
+    write_keep_ids(out_dir, source_keep, target_keep, source=model_path)
+
+    stats = {
+        "source_vocab": (config.vocab_size, len(source_keep)),
+        "target_vocab": (getattr(config, "decoder_vocab_size", None) or config.vocab_size, len(target_keep)),
+        "parameters": (sum(p.numel() for p in model.parameters()), sum(p.numel() for p in trimmed.parameters())),
+    }
+    logger.info(f"Trimmed {model_path} -> {out_dir}: target vocab {stats['target_vocab'][0]} -> "
+                f"{stats['target_vocab'][1]}, source vocab {stats['source_vocab'][0]} -> {stats['source_vocab'][1]}, "
+                f"parameters {stats['parameters'][0] / 1e6:.1f}M -> {stats['parameters'][1] / 1e6:.1f}M", "MODELS")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim a Marian model's vocabulary to the tokens of a corpus")
+    parser.add_argument("--model", required=True, help="MT model path or hub id")
+    parser.add_argument("--target-corpus", required=True, help="Target-language text, one sentence per line")
+    parser.add_argument("--source-corpus", default=None, help="Optional source-language text to trim the encoder too")
+    parser.add_argument("--out", required=True, help="Output directory (use it as the pair's mt_model_paths entry)")
+    args = parser.parse_args()
+    prepare_trimmed_model(args.model, args.target_corpus, args.out, args.source_corpus)
+
+
+if __name__ == "__main__":
+    main()
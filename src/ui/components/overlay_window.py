@@ -247,10 +247,13 @@ class OverlayWindow(ft.Container):
             
         return accumulated, new_count
 
-    def update_translation(self, original: str, translated: str, is_final: bool = False):
+    def update_translation(self, original: str, translated: str, is_final: bool = False,
+                           committed: tuple[str, str] = None):
         """
         Updates the subtitle display with new text.
         Handles merging partial sentences and rolling history when length exceeds Max History.
+        committed is the (original, translated) stable prefix of the utterance when MTWorker
+        commits prefixes; the partial text is then only the tail after it.
         """
         # Strip once at the top
         original = original.strip()
@@ -273,7 +276,14 @@ class OverlayWindow(ft.Container):
         merged_original = " ".join(self._final_originals)
         merged_translated = " ".join(self._final_translated)
         
-        if not is_final:
+        if not is_final and committed is not None:
+            self._accumulated_partial_original = " ".join(filter(None, (committed[0], original)))
+            self._accumulated_partial_translated = " ".join(filter(None, (committed[1], translated)))
+            # Whole utterance is known, no word-count accumulation needed
+            original, translated = self._accumulated_partial_original, self._accumulated_partial_translated
+            merged_original = " ".join(filter(None, (merged_original, original)))
+            merged_translated = " ".join(filter(None, (merged_translated, translated)))
+        elif not is_final:
             if original:
                 self._accumulated_partial_original, self._last_partial_original_word_count = self._accumulate_partial(
                     original, self._accumulated_partial_original, self._last_partial_original_word_count
@@ -316,6 +326,11 @@ class OverlayWindow(ft.Container):
         if self.page:
             self.page.update()
 
+    def set_loading_message(self, message: str):
+        """Show model loading progress under the loading indicator."""
+        if self.is_loading:
+            self.subtitle_display.set_loading_message(message)
+
     def show_settings(self, content):
         """Show the settings overlay with provided content."""
         self.settings_overlay.content = content
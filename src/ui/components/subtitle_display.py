@@ -74,6 +74,7 @@ class SubtitleDisplay(ft.Container):
         """Toggle the loading state UI."""
         self.loading_ring.visible = is_loading
         self.loading_text.visible = is_loading
+        self.loading_text.value = "Loading"
         
         if is_loading:
             self.text_before_translation.visible = False
@@ -87,6 +88,12 @@ class SubtitleDisplay(ft.Container):
         if self.page:
             self.update()
 
+    def set_loading_message(self, message: str):
+        """Update the text shown while loading."""
+        self.loading_text.value = message or "Loading"
+        if self.page:
+            self.update()
+
     def set_font_size(self, size: int):
         """Update the font size."""
         self.text_after_translation.size = size
@@ -58,9 +58,10 @@ class SlidingTextWindow:
         self.page.update()
         
         def _init_and_start_app():
-            self.app = FlowlApp(ui_callback=self.on_translation_event, settings=self.settings)
-            
+            # Start the update loop first so model loading progress reaches the overlay
             self._start_update_processor()
+
+            self.app = FlowlApp(ui_callback=self.on_translation_event, settings=self.settings)
             
             keyboard.add_hotkey(self.settings.lock_hotkey, self.toggle_global_lock)
             
@@ -131,8 +132,11 @@ class SlidingTextWindow:
                             # We only care about the LATEST translation event
                             if event_type == "final":
                                 self._handle_trans_update(event_type, data)
-                            elif event_type == "partial":
+                                latest_trans = None  # Earlier partials/streamed text are superseded by the final
+                            elif event_type in ("partial", "stream"):
                                 latest_trans = (event_type, data)
+                            elif event_type == "loading":
+                                self.overlay.set_loading_message(data.get("message", ""))
                             elif event_type == "lambda":
                                 # Execute generic lambdas immediately
                                 try:
@@ -170,12 +174,16 @@ class SlidingTextWindow:
         self._update_queue.put((event_type, data))
 
     def _handle_trans_update(self, event_type: str, data: dict):
-        if event_type in ["final", "partial"]:
+        if event_type in ["final", "partial", "stream"]:
             original = data.get('original', '')
             translated = data.get('translated', '')
             is_final = (event_type == "final")
+            committed = None
+            # Streamed finals and stable-prefix partials carry the whole utterance so far
+            if "committed_original" in data:
+                committed = (data["committed_original"], data.get("committed_translated", ""))
             try:
-                self.overlay.update_translation(original, translated, is_final=is_final)
+                self.overlay.update_translation(original, translated, is_final=is_final, committed=committed)
             except Exception as e:
                 logger.error(f"Overlay update failed: {e}")
 
@@ -191,7 +199,7 @@ class SlidingTextWindow:
             
         active_idx = None
         if self.app and self.app.audio_engine:
-            active_idx = self.app.audio_engine._input_device_index
+            active_idx = self.app.audio_engine.device_index
             
         settings_app = SettingsTab(self.page, on_saved=on_saved, on_close=on_close, active_device_index=active_idx)
         
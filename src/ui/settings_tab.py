@@ -1,12 +1,13 @@
 """Flet-based settings dialog for Flowl application."""
 import sys
 import os
+import threading
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import flet as ft
 from utils.settings import SettingsManager
-from utils.device_manager import devices_query
+from utils.device_manager import device_identity, devices_query, input_devices
 from utils.logger import logger
 from typing import Callable
 
@@ -24,6 +25,7 @@ class SettingsTab:
             logger.info("Initializing SettingsTab controls...")
             self._create_controls()
             self.content = self._create_content()
+            threading.Thread(target=self._refresh_devices, daemon=True).start()
             logger.info("SettingsTab initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing SettingsTab: {e}")
@@ -118,38 +120,23 @@ class SettingsTab:
         )
         
         self.mt_model_label = ft.TextField(
-            label="MT Model Path",
-            value=self.settings.mt_model_path,
+            label="MT Model Path (prefix with int8:, compiled: or onnx: to change engine)",
+            value=self.settings.mt_model_spec,
             width=400,
         )
         
-        # Device settings
+        # Device settings: cached probe results are shown immediately, a full probe refreshes them in background
         logger.info("Querying devices...")
         try:
-            device_dict = devices_query(current_device_index=self.active_device_index, test_rate=self.settings.rate)
+            device_dict = devices_query(current_device_index=self.active_device_index, cached_only=True, **self._probe_args())
             logger.info(f"Found {len(device_dict)} devices")
         except Exception as e:
             logger.error(f"Error querying devices: {e}")
             device_dict = {}
         
-        device_options = []
-        name_counts = {}
-
-        for idx, name in device_dict.items():
-            name_counts[name] = name_counts.get(name, 0) + 1
-
-        for idx, name in device_dict.items():
-            if name_counts[name] > 1:
-                display_name = f"{name} (#{idx})"
-            else:
-                display_name = name
-            if idx == list(device_dict.keys())[0]:
-                display_name = f"{display_name} - DEFAULT"
-            device_options.append(ft.dropdown.Option(str(idx), display_name))
-        
         self.device_dropdown = ft.Dropdown(
             label="Input Device",
-            options=device_options,
+            options=self._device_options(device_dict),
             value=str(self.settings.device_index) if self.settings.device_index is not None else None,
             width=400,
         )
@@ -169,6 +156,48 @@ class SettingsTab:
             width=500,
         )
     
+    def _probe_args(self) -> dict:
+        return {
+            "test_rate": None if self.settings.native_rate_capture else self.settings.rate,
+            "timeout": self.settings.device_probe_timeout,
+            "workers": self.settings.device_probe_workers,
+            "ttl": self.settings.device_probe_ttl,
+        }
+
+    def _device_options(self, device_dict: dict) -> list:
+        """Build dropdown options, disambiguating duplicate device names."""
+        device_options = []
+        name_counts = {}
+
+        for idx, name in device_dict.items():
+            name_counts[name] = name_counts.get(name, 0) + 1
+
+        for idx, name in device_dict.items():
+            if name_counts[name] > 1:
+                display_name = f"{name} (#{idx})"
+            else:
+                display_name = name
+            if idx == list(device_dict.keys())[0]:
+                display_name = f"{display_name} - DEFAULT"
+            device_options.append(ft.dropdown.Option(str(idx), display_name))
+        return device_options
+
+    def _refresh_devices(self):
+        """Probe devices in the background and replace the cached list once done."""
+        try:
+            device_dict = devices_query(current_device_index=self.active_device_index, **self._probe_args())
+        except Exception as e:
+            logger.error(f"Error refreshing devices: {e}")
+            return
+        self.device_dropdown.options = self._device_options(device_dict)
+        if self.device_dropdown.value not in {option.key for option in self.device_dropdown.options}:
+            self.device_dropdown.value = None
+        logger.info(f"Device list refreshed: {len(device_dict)} working devices")
+        try:
+            self.page.update()
+        except Exception:
+            pass
+
     def _create_content(self):
         """Create the main content with tabs."""
         # Audio tab
@@ -269,7 +298,7 @@ class SettingsTab:
     def _update_model_paths(self):
         """Update the model path labels."""
         self.asr_model_label.value = self.settings.model_path
-        self.mt_model_label.value = self.settings.mt_model_path
+        self.mt_model_label.value = self.settings.mt_model_spec
     
     def _update_config_info(self):
         """Update the configuration information."""
@@ -327,13 +356,15 @@ class SettingsTab:
             # Device settings
             if self.device_dropdown.value:
                 self.settings.device_index = int(self.device_dropdown.value)
-                for option in self.device_dropdown.options:
-                    if option.key == self.device_dropdown.value:
-                        self.settings.device_name = option.text
-                        break
+                device = next((d for d in input_devices() if d['index'] == self.settings.device_index), None)
+                if device is not None:
+                    self.settings.device_hostapi, self.settings.device_name = device_identity(device)
+                else:
+                    self.settings.device_hostapi, self.settings.device_name = None, None
             else:
                 self.settings.device_index = None
                 self.settings.device_name = None
+                self.settings.device_hostapi = None
 
             # Keybind settings
             self.settings.lock_hotkey = self.lock_hotkey_field.value.strip()
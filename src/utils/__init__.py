@@ -2,7 +2,8 @@
 
 from .utils import (
     filter_partial,
-    exec_time_wrap
+    exec_time_wrap,
+    perf_note
 )
 
 from .device_manager import DeviceManager
@@ -12,5 +13,6 @@ __all__ = [
     "filter_partial",
     "DeviceManager",
     "exec_time_wrap",
+    "perf_note",
     "SettingsManager"
 ]
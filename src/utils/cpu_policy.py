@@ -0,0 +1,103 @@
+"""CPU partitioning between Vosk decoding (ASR thread), MT inference and the UI."""
+
+import os
+import sys
+import time
+from .logger import logger
+
+
+def available_cores() -> list[int]:
+    """Cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def default_mt_threads() -> int:
+    """Leave one core for the ASR thread and one for the UI loop."""
+    return max(1, len(available_cores()) - 2)
+
+
+def pin_current_thread(cores: list[int], label: str) -> bool:
+    """
+    Restrict the calling thread to the given cores (Linux only; os.sched_setaffinity with
+    pid 0 applies to the calling thread there). Threads started afterwards inherit it,
+    which is how torch's intra-op pool ends up on the MT cores.
+    """
+    if not cores:
+        return False
+    if not sys.platform.startswith("linux"):
+        logger.debug(f"CPU affinity for {label} is only supported on Linux", "CPU")
+        return False
+    allowed = set(available_cores())
+    cores = [core for core in cores if core in allowed]
+    if not cores:
+        logger.warning(f"None of the {label} cores are available to this process", "CPU")
+        return False
+    try:
+        os.sched_setaffinity(0, cores)
+    except OSError as e:
+        logger.warning(f"Failed to pin {label} thread to cores {cores}: {e}", "CPU")
+        return False
+    logger.info(f"Pinned {label} thread to cores {cores}", "CPU")
+    return True
+
+
+def configure_torch_threads(settings) -> int:
+    """Apply mt_threads / mt_interop_threads to torch. Returns the intra-op thread count in use."""
+    import torch
+    threads = settings.mt_threads or default_mt_threads()
+    torch.set_num_threads(threads)
+    try:
+        # Only allowed before the first inter-op parallel work; a restart keeps the earlier value
+        torch.set_num_interop_threads(max(1, settings.mt_interop_threads))
+    except RuntimeError:
+        pass
+    return threads
+
+
+def split_cores(mt_threads: int) -> tuple[list[int], list[int]]:
+    """(asr_cores, mt_cores): ASR gets the last core, MT the first mt_threads, the UI keeps the rest."""
+    cores = available_cores()
+    if len(cores) < 2:
+        return [], []
+    asr_cores = cores[-1:]
+    mt_cores = cores[:max(1, min(mt_threads, len(cores) - 1))]
+    return asr_cores, mt_cores
+
+
+def placement(settings) -> tuple[list[int], list[int]]:
+    """(asr_cores, mt_cores) from settings, falling back to split_cores."""
+    asr_default, mt_default = split_cores(settings.mt_threads or default_mt_threads())
+    return settings.asr_cores or asr_default, settings.mt_cores or mt_default
+
+
+def autotune_mt_threads(translate_batch, texts: list[str], repeats: int = 3, tolerance: float = 0.1) -> tuple[int, dict]:
+    """
+    Time translate_batch on texts for each candidate intra-op thread count and return the
+    smallest count within `tolerance` of the fastest, so the cores that buy almost nothing
+    for MT stay free for Vosk and the UI. Also returns {threads: median ms} for logging.
+    """
+    import torch
+    original = torch.get_num_threads()
+    limit = max(1, len(available_cores()) - 1)
+    candidates = sorted({t for t in (1, 2, 3, 4, 6, 8, 12, 16) if t <= limit} | {limit})
+
+    timings = {}
+    try:
+        for threads in candidates:
+            torch.set_num_threads(threads)
+            translate_batch(texts[:1])  # Let the pool resize before timing
+            runs = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                for text in texts:
+                    translate_batch([text])
+                runs.append((time.perf_counter() - start) * 1000 / len(texts))
+            timings[threads] = sorted(runs)[len(runs) // 2]
+    finally:
+        torch.set_num_threads(original)
+
+    best = min(timings.values())
+    chosen = min(t for t, ms in timings.items() if ms <= best * (1 + tolerance))
+    return chosen, timings
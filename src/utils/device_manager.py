@@ -1,80 +1,305 @@
+import time
+import threading
 import sounddevice as sd
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from typing import Dict
 from .logger import logger
 
 
-class DeviceManager:
-    def __init__(self, settings):
-        self.settings = settings
-        self._devices = [device for device in sd.query_devices() if device['max_input_channels'] > 0]
+def device_native_format(device: dict) -> tuple[int, int]:
+    """Return the (sample rate, channels) a device is expected to accept natively."""
+    rate = int(device.get('default_samplerate') or 0) or 48000
+    channels = max(1, min(2, int(device['max_input_channels'])))
+    return rate, channels
 
-    def _is_device_working(self, device_index: int) -> bool:
-        """Test if a specific device can be opened."""
+
+# Threads inside PortAudio (probes, capture streams); a rescan re-initializes it only when there are none
+_portaudio = threading.Condition()
+_portaudio_users = 0
+
+
+def acquire_portaudio() -> None:
+    """Register a PortAudio user; blocks while a rescan is re-initializing it."""
+    global _portaudio_users
+    with _portaudio:
+        _portaudio_users += 1
+
+
+def release_portaudio() -> None:
+    global _portaudio_users
+    with _portaudio:
+        _portaudio_users -= 1
+        _portaudio.notify_all()
+
+
+@contextmanager
+def portaudio_in_use():
+    acquire_portaudio()
+    try:
+        yield
+    finally:
+        release_portaudio()
+
+
+def _rescan(wait: float) -> bool:
+    """Re-initialize PortAudio once no probe or stream is in it (waiting up to `wait` seconds)."""
+    with _portaudio:
+        # Probes stuck in a driver never return, so give up rather than wait for them
+        if not _portaudio.wait_for(lambda: _portaudio_users == 0, timeout=wait):
+            logger.warning(f"Skipping audio device rescan: {_portaudio_users} probes/streams still open", "DEVICE")
+            return False
+        # Holding the lock keeps new probes and streams out until PortAudio is back
+        try:
+            sd._terminate()
+            sd._initialize()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to rescan audio devices: {e}", "DEVICE")
+            return False
+
+
+def input_devices(refresh: bool = False, wait: float = 0.0) -> list[dict]:
+    """
+    Input devices as PortAudio sees them. PortAudio only rescans the hardware when it is
+    re-initialized, which refresh=True does, but only once no probe or capture stream is in PortAudio.
+    """
+    if refresh:
+        _rescan(wait)
+    with portaudio_in_use():
+        return [device for device in sd.query_devices() if device['max_input_channels'] > 0]
+
+
+def device_identity(device: dict) -> tuple[str, str]:
+    """(host API name, device name): identifies a device across rescans, unlike its index."""
+    with portaudio_in_use():
+        return sd.query_hostapis(device['hostapi'])['name'], device['name']
+
+
+class DeviceProber:
+    """
+    Opens input devices in a thread pool to check they work, with a per-device timeout that
+    starts when that device's probe starts. Timeouts are not cached.
+    Results are cached by (host API, device name, rate, channels) for a TTL; the whole cache
+    is dropped when the device list changes. Device indices are not used as keys because
+    they shift when devices are added or removed.
+    """
+    def __init__(self):
+        self._cache: dict[tuple, tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+        self._signature = None
+        self._hostapis = None
+
+    def _key(self, device: dict, rate: int, channels: int) -> tuple:
+        if self._hostapis is None:
+            with portaudio_in_use():
+                self._hostapis = [api['name'] for api in sd.query_hostapis()]
+        hostapi = self._hostapis[device['hostapi']] if device['hostapi'] < len(self._hostapis) else device['hostapi']
+        return hostapi, device['name'], rate, channels
+
+    def _check_device_list(self) -> None:
+        # The whole list, not the devices being probed: callers probe different subsets of it
+        signature = tuple((d['hostapi'], d['name'], d['max_input_channels']) for d in input_devices())
+        with self._lock:
+            if signature != self._signature:
+                if self._signature is not None:
+                    logger.info("Input device list changed, dropping device probe cache", "DEVICE")
+                self._cache.clear()
+                self._hostapis = None
+                self._signature = signature
+
+    def _timed_open(self, device: dict, rate: int, channels: int, started: dict) -> bool:
+        # Counted until it returns, even after probe() gave up on it, so no rescan pulls PortAudio away
+        with portaudio_in_use():
+            started[device['index']] = time.monotonic()
+            return self._open(device, rate, channels)
+
+    @staticmethod
+    def _open(device: dict, rate: int, channels: int) -> bool:
         test_stream = None
         try:
             test_stream = sd.InputStream(
-                device=device_index,
-                channels=1,
-                samplerate=self.settings.rate,
+                device=device['index'],
+                channels=channels,
+                samplerate=rate,
                 dtype='int16',
             )
             return True
         except Exception as e:
-            device_name = "Unknown"
-            for device in self._devices:
-                if device['index'] == device_index:
-                    device_name = device['name']
-                    break
-            logger.warning(f"Device '{device_name}' (index {device_index}) is not working: {e}", "DEVICE")
+            logger.warning(f"Device '{device['name']}' (index {device['index']}) is not working: {e}", "DEVICE")
             return False
         finally:
             if test_stream:
                 test_stream.close()
 
+    def cached(self, devices: list[dict], formats: dict[int, tuple[int, int]], ttl: float) -> dict[int, bool | None]:
+        """Cached result per device index; None when unknown or expired."""
+        self._check_device_list()
+        now = time.monotonic()
+        results = {}
+        with self._lock:
+            for device in devices:
+                entry = self._cache.get(self._key(device, *formats[device['index']]))
+                results[device['index']] = entry[0] if entry and now - entry[1] < ttl else None
+        return results
+
+    def probe(self, devices: list[dict], formats: dict[int, tuple[int, int]], ttl: float,
+              timeout: float = 2.0, workers: int = 4, force: bool = False) -> dict[int, bool]:
+        """
+        Probe devices concurrently, reusing fresh cache entries unless force is set.
+        Devices whose probe timed out (or never started) are left out of the result.
+        """
+        results = {} if force else {i: ok for i, ok in self.cached(devices, formats, ttl).items() if ok is not None}
+        pending = [device for device in devices if device['index'] not in results]
+        if not pending:
+            return results
+
+        start = time.perf_counter()
+        # A probe stuck inside PortAudio cannot be cancelled, so the pool is not waited on
+        workers = max(1, workers)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="device-probe")
+        started: dict[int, float] = {}
+        try:
+            futures = {executor.submit(self._timed_open, device, *formats[device['index']], started): device
+                       for device in pending}
+            waiting = set(futures)
+            stuck = 0
+            while waiting:
+                done, waiting = wait(waiting, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    device = futures[future]
+                    ok = future.result()
+                    results[device['index']] = ok
+                    with self._lock:
+                        self._cache[self._key(device, *formats[device['index']])] = (ok, time.monotonic())
+                now = time.monotonic()
+                for future in list(waiting):
+                    device = futures[future]
+                    begun = started.get(device['index'])
+                    if begun is not None and now - begun >= timeout:
+                        # Not cached: the device may respond next time, it just stays unknown for now
+                        logger.warning(f"Device '{device['name']}' (index {device['index']}) probe timed out", "DEVICE")
+                        waiting.discard(future)
+                        stuck += 1
+                if waiting and stuck >= workers:
+                    logger.warning(f"All probe workers are stuck, {len(waiting)} devices left unprobed", "DEVICE")
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.debug(f"Probed {len(pending)} devices in {(time.perf_counter() - start) * 1000:.0f} ms", "DEVICE")
+        return results
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+# Shared by DeviceManager and the settings screen
+device_prober = DeviceProber()
+
+
+class DeviceManager:
+    def __init__(self, settings):
+        self.settings = settings
+        # Built before the capture stream is (re)opened, so PortAudio can rescan for plugged/unplugged devices
+        self._devices = input_devices(refresh=True, wait=settings.device_probe_timeout)
+
+    def capture_format(self, device_index: int) -> tuple[int, int]:
+        """(sample rate, channels) to open the device with."""
+        if not self.settings.native_rate_capture:
+            return self.settings.rate, 1
+        for device in self._devices:
+            if device['index'] == device_index:
+                return device_native_format(device)
+        return device_native_format(sd.query_devices(device_index))
+
+    def _probe(self, devices: list[dict]) -> dict[int, bool]:
+        formats = {device['index']: self.capture_format(device['index']) for device in devices}
+        return device_prober.probe(
+            devices, formats,
+            ttl=self.settings.device_probe_ttl,
+            timeout=self.settings.device_probe_timeout,
+            workers=self.settings.device_probe_workers,
+        )
+
+    def _is_device_working(self, device_index: int) -> bool:
+        """Test if a specific device can be opened."""
+        devices = [device for device in self._devices if device['index'] == device_index]
+        if not devices:
+            logger.warning(f"Device index {device_index} is not an input device", "DEVICE")
+            return False
+        return self._probe(devices).get(device_index, False)
+
+    def saved_device(self) -> int | None:
+        """
+        Current index of the device saved in settings. A rescan renumbers devices, so it is looked up
+        by (host API, name); the saved index only picks among same-named devices, or is used as is
+        for settings saved without a host API.
+        """
+        index = self.settings.device_index
+        if index is None or not self.settings.device_hostapi:
+            return index
+        identity = (self.settings.device_hostapi, self.settings.device_name)
+        matches = [device['index'] for device in self._devices if device_identity(device) == identity]
+        if not matches:
+            logger.warning(f"Saved device '{identity[1]}' ({identity[0]}) is not connected", "DEVICE")
+            return None
+        return index if index in matches else matches[0]
+
+    def select(self, device_index: int | None) -> int | None:
+        """Device to switch to without a rescan: device_index if it works, else what startup() picks."""
+        if device_index is not None and self._is_device_working(device_index):
+            return device_index
+        if device_index is not None:
+            logger.warning(f"Selected device {device_index} not available, falling back", "DEVICE")
+        return self.startup()
+
     def startup(self) -> int | None:
         """Return device from settings or fallback to first working device."""
-        # Try to use saved device_index if exists
-        if self.settings.device_index is not None:
-            if self._is_device_working(self.settings.device_index):
-                logger.info(f"Using saved device index: {self.settings.device_index}", "DEVICE")
-                return self.settings.device_index
+        # Try to use the saved device if it is still there
+        device_index = self.saved_device()
+        if device_index is not None:
+            if self._is_device_working(device_index):
+                logger.info(f"Using saved device index: {device_index}", "DEVICE")
+                return device_index
             else:
-                logger.warning(f"Saved device {self.settings.device_index} not available, falling back", "DEVICE")
+                logger.warning(f"Saved device {device_index} not available, falling back", "DEVICE")
 
-        # Fallback: find first working input device
+        # Fallback: probe all devices at once, keep the first working one in device order
+        results = self._probe(self._devices)
         for device in self._devices:
-            if self._is_device_working(device['index']):
+            if results.get(device['index']):
                 logger.info(f"Using fallback device: {device['name']} (index: {device['index']})", "DEVICE")
                 return device['index']
-        
+
         raise RuntimeError("No working audio input devices found.")
 
 
-def devices_query(current_device_index: int = None, test_rate: int = 16000) -> Dict[int, str]:
-    """Get dict of working input devices {index: name}."""
-    devices = [device for device in sd.query_devices() if device['max_input_channels'] > 0]
-    working_devices = {}
-    
-    for device in devices:
-        index = device['index']
-        # Skip testing if it's our currently used device because we know it works
-        # and opening it again might throw a PortAudio error or lock it.
-        if index == current_device_index:
-            working_devices[index] = device['name']
-            continue
-            
-        # Test if device is working
-        try:
-            test_stream = sd.InputStream(
-                device=index,
-                channels=1,
-                samplerate=test_rate,
-                dtype='int16',
-            )
-            test_stream.close()
-            working_devices[index] = device['name']
-        except:
-            pass  # Skip non-working devices
-    
-    return working_devices
+def devices_query(current_device_index: int = None, test_rate: int = None, cached_only: bool = False,
+                  timeout: float = 2.0, workers: int = 4, ttl: float = 300.0) -> Dict[int, str]:
+    """
+    Get dict of working input devices {index: name}. Devices are tested at their native format unless test_rate is given.
+    With cached_only=True nothing is opened: devices known to fail are left out, unknown ones are listed.
+    Otherwise every device is re-probed: PortAudio's device list goes stale while a stream is open,
+    so opening is the only way to notice that a cached working device was unplugged.
+    """
+    devices = input_devices()
+    formats = {
+        device['index']: (test_rate, 1) if test_rate else device_native_format(device)
+        for device in devices
+    }
+
+    # Skip testing our currently used device because we know it works
+    # and opening it again might throw a PortAudio error or lock it.
+    to_probe = [device for device in devices if device['index'] != current_device_index]
+    if cached_only:
+        results = device_prober.cached(to_probe, formats, ttl)
+    else:
+        results = device_prober.probe(to_probe, formats, ttl, timeout=timeout, workers=workers, force=True)
 
+    return {
+        device['index']: device['name']
+        for device in devices
+        if device['index'] == current_device_index or results.get(device['index']) is not False
+    }
@@ -3,20 +3,77 @@
 import json
 import os
 from dataclasses import dataclass, asdict, field
+from typing import ClassVar
 from utils.logger import logger
 
 
+# MT engines selectable per language pair by prefixing the mt_model_paths entry, e.g. "int8:Helsinki-NLP/opus-mt-en-ru"
+MT_ENGINES = ("torch", "int8", "compiled", "onnx")
+
+
+def split_engine(spec: str) -> tuple[str, str]:
+    """Split an mt_model_paths entry into (engine, model path)."""
+    engine, sep, path = spec.partition(":")
+    return (engine, path) if sep and engine in MT_ENGINES else ("torch", spec)
+
 @dataclass
 class SettingsManager:
     """Configuration settings for Flowl application."""
+    config_path: ClassVar[str] = "config.json"  # File these settings are saved to (set by load_from_file)
     
     # Audio configuration
-    rate: int = 16000
+    rate: int = 16000  # Recognizer rate; capture happens at the device's native rate when enabled
+    native_rate_capture: bool = True
     frames_per_buffer: int = 2048
+    audio_buffer_blocks: int = 50  # Ring buffer capacity, in frames_per_buffer blocks
+
+    # Audio source: "device" (microphone) or "file" (WAV / raw int16 PCM replay)
+    audio_source: str = "device"
+    audio_file_path: str = None
+    audio_file_realtime: bool = True
+    audio_file_rate: int = None  # Raw PCM only; WAV files carry their own format
+    audio_file_channels: int = 1
+
+    # Session recording (raw capture + timing, replayable via audio_source="file" with a .flrec path)
+    record_session: bool = False
+    record_dir: str = "recordings"
     throttle_ms: int = 50
     max_part_words: int = 16
     min_part_words: int = 1
     min_part_chars: int = 1
+    mt_batch_window_ms: int = 10  # How long MTWorker waits to gather more events into one batch
+    mt_max_batch: int = 8
+    mt_partial_reuse: bool = True  # Keep the previous partial's translation as decoder prefix while the source grows
+    mt_partial_rollback: int = 3  # Trailing target tokens of that prefix that are re-decoded
+    mt_stable_prefix: bool = True  # Commit words the last mt_agreement_n partials agree on; partials translate only the tail, finals whole
+    mt_agreement_n: int = 2
+    mt_commit_min_words: int = 3  # Smallest segment worth committing (very short segments translate poorly)
+    mt_stream_finals: bool = True  # Show a final's translation word by word while decoding (when it is alone in its batch)
+    # Generation budget: target tokens <= source tokens * pair ratio + margin, plus wall-clock deadlines (0 = none)
+    mt_length_ratios: dict = field(default_factory=lambda: {"en-ru": 1.5, "ru-en": 1.3})
+    mt_length_margin: int = 8
+    mt_max_new_tokens: int = 128
+    mt_partial_deadline_ms: int = 300
+    mt_final_deadline_ms: int = 2000
+    translation_memory: bool = True  # Persist final translations across sessions
+    translation_memory_path: str = "translation_memory.sqlite3"
+    translation_cache_mb: int = 32  # In-memory LRU in front of the translation memory
+    # Ignored at either end of a source text when looking up translations
+    translation_filler_words: tuple = ("um", "uh", "uhm", "er", "erm", "ah", "hmm", "mm", "эм", "ээ", "мм", "хм")
+
+    # Voice activity detection
+    vad_enabled: bool = True
+    vad_preroll_ms: int = 300
+    vad_hangover_ms: int = 400
+    vad_margin_db: float = 10.0
+    vad_flatness_threshold: float = 0.5
+    vad_zcr_threshold: float = 0.35
+
+    # Noise reduction (spectral gating on the ASR thread)
+    noise_reduction: bool = False
+    noise_reduction_strength: float = 1.5
+    noise_reduction_floor: float = 0.1
+    noise_reduction_budget: float = 0.25  # Max CPU time per block, as a fraction of the block duration
     
     # Language configuration
     from_code: str = "en"
@@ -26,6 +83,10 @@ class SettingsManager:
     # Device settings
     device_index: int = None
     device_name: str = None
+    device_hostapi: str = None  # With device_name, finds the saved device again after devices are renumbered
+    device_probe_timeout: float = 2.0
+    device_probe_workers: int = 4
+    device_probe_ttl: float = 300.0  # Seconds a probe result stays valid
     
     # UI configuration
     font_size: int = 24
@@ -44,10 +105,29 @@ class SettingsManager:
         "ru": r"C:\Users\nikit\Desktop\Flowl_necessary_files\vosk-ru"
     })
     
+    # Entries may carry an engine prefix ("int8:<path>", "compiled:<path>", "onnx:<path>"); unprefixed entries use torch
     mt_model_paths: dict = field(default_factory=lambda: {
         "en-ru": "Helsinki-NLP/opus-mt-en-ru",
         "ru-en": "Helsinki-NLP/opus-mt-ru-en"
     })
+    # Optional faster model (distilled, pruned or "int8:") used only for partials, same format as mt_model_paths
+    mt_partial_model_paths: dict = field(default_factory=dict)
+    # Optional small model with the same vocabulary that drafts tokens for finals (speculative decoding, same output)
+    mt_draft_model_paths: dict = field(default_factory=dict)
+    model_cache_mb: int = 4096  # RAM budget for models kept resident across restarts
+    mt_warmup: bool = True  # Run a dummy generate after loading so the first translation is not slow
+    onnx_cache_dir: str = "onnx_models"  # Exported ONNX graphs, reused across runs
+    mt_quantized_dir: str = "quantized_models"  # INT8 artifacts for the "int8" engine
+    mt_compile_cache_dir: str = "compiled_models"  # torch.compile caches for the "compiled" engine
+    mt_compile_buckets: tuple = (16, 32, 64, 128)  # Source lengths (tokens) inputs are padded to; one graph each
+
+    # CPU placement; mt_threads 0 = all cores but one for ASR and one for the UI
+    mt_threads: int = 0
+    mt_interop_threads: int = 1
+    thread_autotune: bool = False  # When mt_threads is 0, benchmark thread counts once in the background and save the pick
+    pin_threads: bool = False  # Linux only: pin the ASR and MT threads to asr_cores / mt_cores
+    asr_cores: list = None  # None = last core
+    mt_cores: list = None  # None = the first mt_threads cores
     
     # Model paths (computed properties)
     @property
@@ -55,15 +135,48 @@ class SettingsManager:
         """Get the ASR model path based on from_code."""
         return self.asr_model_paths.get(self.from_code, "")
     
+    @property
+    def mt_model_spec(self) -> str:
+        """Raw mt_model_paths entry for from_code and to_code, including any engine prefix."""
+        pair = f"{self.from_code}-{self.to_code}"
+        return self.mt_model_paths.get(pair, "Helsinki-NLP/opus-mt-en-ru")
+
+    @property
+    def mt_engine(self) -> str:
+        """MT engine for the current language pair."""
+        return split_engine(self.mt_model_spec)[0]
+
     @property
     def mt_model_path(self) -> str:
         """Get the MT model path based on from_code and to_code."""
+        return split_engine(self.mt_model_spec)[1]
+
+    @property
+    def mt_partial_model_spec(self) -> str:
+        """mt_partial_model_paths entry for the current pair; falls back to the final model."""
         pair = f"{self.from_code}-{self.to_code}"
-        return self.mt_model_paths.get(pair, "Helsinki-NLP/opus-mt-en-ru")
+        return self.mt_partial_model_paths.get(pair) or self.mt_model_spec
+
+    @property
+    def mt_length_ratio(self) -> float:
+        """Target tokens per source token for the current pair (generous default for unlisted pairs)."""
+        pair = f"{self.from_code}-{self.to_code}"
+        return self.mt_length_ratios.get(pair, 2.0)
+
+    @property
+    def mt_draft_model_spec(self) -> str:
+        """mt_draft_model_paths entry for the current pair; empty when finals decode without a draft."""
+        pair = f"{self.from_code}-{self.to_code}"
+        return self.mt_draft_model_paths.get(pair, "")
 
     
-    def save_to_file(self, filepath: str = "config.json") -> None:
-        """Save settings to JSON file."""
+    def to_json_dict(self) -> dict:
+        """Settings as config.json stores them (tuples become lists), for comparing with loaded settings."""
+        return json.loads(json.dumps(asdict(self), ensure_ascii=False))
+
+    def save_to_file(self, filepath: str = None) -> None:
+        """Save settings to JSON file (by default the one they were loaded from)."""
+        filepath = filepath or self.config_path
         config_data = asdict(self)
         
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -72,21 +185,20 @@ class SettingsManager:
     @classmethod
     def load_from_file(cls, filepath: str = "config.json") -> "SettingsManager":
         """Load settings from JSON file."""
-        if not os.path.exists(filepath):
-            return cls()
-        
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-            
-            # Create settings instance
-            settings = cls(**config_data)
-            return settings
-            
-        except (json.JSONDecodeError, ValueError, TypeError) as e:
-            logger.warning(f"Error loading config file {filepath}: {e}", "SETTINGS")
-            logger.info("Using default settings.", "SETTINGS")
-            return cls()
+        settings = cls()
+        if os.path.exists(filepath):
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    config_data = json.load(f)
+
+                # Create settings instance
+                settings = cls(**config_data)
+
+            except (json.JSONDecodeError, ValueError, TypeError) as e:
+                logger.warning(f"Error loading config file {filepath}: {e}", "SETTINGS")
+                logger.info("Using default settings.", "SETTINGS")
+        settings.config_path = filepath
+        return settings
     
     def update_from_dict(self, config_dict: dict) -> None:
         """Update settings from dictionary."""
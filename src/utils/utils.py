@@ -1,8 +1,11 @@
 """Small text utilities for Flowl."""
 
+import threading
 import time
 from .logger import logger
 
+_perf_notes = threading.local()
+
 def filter_partial(text: str, max_words: int) -> str:
     """Trim a partial string to the last max_words words."""
     words = text.split()
@@ -10,12 +13,25 @@ def filter_partial(text: str, max_words: int) -> str:
         text = " ".join(words[-max_words:])
     return text
 
+def perf_note(**values) -> None:
+    """Attach values to the PERF line of the innermost exec_time_wrap call running on this thread."""
+    stack = getattr(_perf_notes, "stack", None)
+    if stack:
+        stack[-1].update(values)
+
 def exec_time_wrap(func):
     def wrapper(*args, **kwargs):
+        stack = getattr(_perf_notes, "stack", None)
+        if stack is None:
+            stack = _perf_notes.stack = []
+        stack.append({})
         start = time.perf_counter()
-        result = func(*args, **kwargs)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            notes = stack.pop()
         end = time.perf_counter()
-        logger.debug(f'Function {func.__name__} took {end - start:.6f} seconds', "PERF")
+        extra = "".join(f", {key}={value}" for key, value in notes.items())
+        logger.debug(f'Function {func.__name__} took {end - start:.6f} seconds{extra}', "PERF")
         return result
     return wrapper
- 
\ No newline at end of file